@@ -1,3 +1,10 @@
+// Set BINARY_MODE to 1 to send each sample as a compact 12 byte frame instead of a line of text, and
+// 'mode = binary' under 'SETUP' in setup.ini. BAUD must match 'bps' under 'SETUP' in setup.ini.
+// See lib/protocol.py for the layout of a frame.
+#define BINARY_MODE 0
+#define BAUD 9600
+#define SYNC 0xA5
+
 const float a_reading = 22.0;
 const float a_load = 0.98;
 const float b_reading = 57.0;
@@ -7,13 +14,28 @@ unsigned long time;
 int interval = 1;
 
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(BAUD);
 }
 
 void loop() {
   main_loop();
 }
 
+void send_frame(unsigned int raw, float load, unsigned long t){
+  byte frame[12];
+  frame[0] = SYNC;
+  memcpy(&frame[1], &raw, 2);
+  memcpy(&frame[3], &load, 4);
+  memcpy(&frame[7], &t, 4);
+
+  byte sum = 0;
+  for (int i = 1; i < 11; i++){
+    sum += frame[i];
+  }
+  frame[11] = sum;
+  Serial.write(frame, 12);
+}
+
 void main_loop(){
   float new_measure = analogRead(0);
   float load = ((b_load - a_load) / (b_reading - a_reading)) * (new_measure - a_reading) + a_load;
@@ -22,6 +44,10 @@ void main_loop(){
     //Serial.print(load);
     //Serial.print("\n");
     if (millis() > time + interval){
+#if BINARY_MODE
+      time = millis();
+      send_frame((unsigned int) new_measure, load, time);
+#else
       Serial.print("Reading: ");
       Serial.print(new_measure, 1);
       Serial.print(" ");
@@ -31,6 +57,7 @@ void main_loop(){
       Serial.print(" ");
       Serial.print(time);
       Serial.print("\n");
+#endif
     } 
  // }
 }
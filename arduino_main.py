@@ -2,61 +2,107 @@
 NOTE: This module is in beta stages and redevelopment will be necessary for improved efficiency later on.
 CREDIT: Program created by Ethan Smith-Coss
 
-    The baurate of the Arduino must be set at 9600 and if the COMs port stored does not match the Arduino then
-    this module will reconnect to the correct port and store the new COM port. If the connection to Arduino is
-    lost then the script will try and reconnect to the Arduino on the same port every 10 seconds. If this is
-    unsuccessful then a new port is searched for, becoming the new COMs port and stored, however if the Arduino
-    is found on the same port and baurate then the connection is re-established and the program starts over again.
+    The baurate of the Arduino must match 'bps' in setup.ini, 9600 by default, and if the COMs port stored does
+    not match the Arduino then this module will reconnect to the correct port and store the new COM port. If the
+    connection to Arduino is lost then the reconnection supervisor, lib/supervisor.py, retries straight away with
+    a short exponential backoff. The Arduino is looked for by the USB fingerprint remembered under 'DEVICE' in
+    setup.ini, so if it reappears on a new port that port is used, becoming the new COMs port and stored.
 
     Some important classes and methods of this module.
-        class Connect           flags | flush '-f', reset '-r':
+        class Connect           flags | flush '-f', reset '-r', headless '-h', multi '-m', batch '-b', verbose '-v':
             This is the main class of the whole application and should be the primary reference point when
             calling the module externally. This class does not take any parameters and initialises some
             important global variables as followed:
                 self.port           the main COMs port that is used to create a serial link to the Arduino.
                 self.bps            the baurate of the Arduino that's used in conjunction with self.port.
+                self.mode           'text' or 'binary', the protocol the sketch is sending in, read from 'mode'
+                                    under 'SETUP' in setup.ini. Binary mode sends compact frames, allowing a
+                                    higher baurate to be set in 'bps', see lib/protocol.py.
+                self.format         'csv', 'compact' or 'mapped', the format sessions are recorded in, read from
+                                    'format' under 'SETUP' in setup.ini. Compact sessions are .fcs files taking
+                                    a fraction of the space of CSV, see lib/compact.py, and mapped sessions are
+                                    .fcm files opened instantly whatever their length, see lib/mapped.py.
                 self.ports_list     a list of the currently available COMs ports
                 self.app            an object variable of the class Main. To access variables and methods
                                     within Main, this variable should be referenced.
+                self.subscribers    a list of callbacks called by main() with the force, newtons and time arrays
+                                    of every batch of samples, such as the live plot opened from 'Live Plot' in
+                                    Tools (lib/live_plot.py).
+                self.dsp            the streaming filters and pulse detection applied to newtons before it is
+                                    displayed and recorded, class Pipeline in lib/dsp.py, configured under 'DSP'
+                                    in setup.ini. None, and lib/dsp.py is never imported, if nothing is set.
+                self.publisher      streams every batch of samples to other processes over a local socket, class
+                                    Publisher in lib/publisher.py, listening on 'address' under 'PUBLISH' in
+                                    setup.ini. None, and lib/publisher.py is never imported, if no address is set.
+                self.catalog        the session catalog, class Catalog in lib/catalog.py, a SQLite database at
+                                    'path' under 'CATALOG' in setup.ini. Every recording session is given its ID
+                                    by the catalog and recorded to results/session_<id>.csv, and its start time,
+                                    port, sample count, peak, average and duration are stored when completed.
                 
-        function connect()      parameters | self               belongs to | Connect:
-            This function is responsible for initialising the serial connection to the Arduino on the defined
-            ports in class Connect. If the connection is not established then the program will search for another
-            available port and reconnect on that port or re-establish the same connection - both occur after 10 seconds.
-
-            If the connection to the Arduino is lost whilst reading the serial data stream, then this function is too
-            responsible for reconnecting the serial data stream.
+        function connect()      parameters | self, port         belongs to | Connect:
+            This function is responsible for initialising the serial connection to the Arduino on port, self.port
+            if not given, and returns True if the connection is established. It is called by self.supervisor, class
+            Supervisor in lib/supervisor.py, which owns all reconnection: the reader thread calls lost() the moment
+            the connection is lost and the supervisor calls this function again after 0.1s, doubling the wait after
+            every failed attempt up to 5s, 'initial' and 'maximum' under 'RECONNECT' in setup.ini. When the Arduino
+            is connected on a new port, or its fingerprint is first seen, both are written to setup.ini.
             Some notable global variables within this function accessed through class Connect():
                 self.arduino            this is the main variable that holds a link to the arduino
                                         and is reads the serial data stream forever. If the connection
                                         to the Arduino is lost this variable loses its link and raises
-                                        the exception serial.SerialException() in function main()
+                                        the exception serial.SerialException() in class SerialReader
                 self.connection_lost    responsible for determining when the connection to the Arduino
                                         is lost and re-established during conditional verification.
+                self.fingerprint        the USB vendor ID, product ID and serial number of the Arduino,
+                                        class Fingerprint in lib/supervisor.py, used to find it on any port.
 
         function flags()        parameters | self, flag_list    belongs to | Connect:
             This function interprets flags passed to class Connect through the CLI on program execute.
             The valid flags are as followed:
                 flags:
                     flush '-f'          delete all CSV files generated from events. Files are unlinked
-                                        and are not retrievable. NOTE: files stored in 'results' are not
-                                        filtered to CSV only, beware of additional files stored in this
-                                        directory as they too are deleted!
-                    reset '-r'          reset variables in the setup.ini file. Notable defaults are
-                                        'count' under 'SETUP' to reset the default naming convention for
-                                        CSV files of recorded events.
+                                        and are not retrievable, and are dropped from the session catalog.
+                                        NOTE: files stored in 'results' are not filtered to CSV only, beware
+                                        of additional files stored in this directory as they too are deleted!
+                    reset '-r'          reset variables in the setup.ini file. Session files are named from
+                                        the IDs of the session catalog, so a reset never reuses a file name.
+                    headless '-h'       run without the tkinter window, see function headless(). Samples
+                                        are recorded straight to CSV until a limit given as name=value
+                                        pairs after the flags is reached or the process is interrupted:
+                                            python arduino_main.py -h duration=60 samples=10000 stdout
+                    multi '-m'          acquire from every detected port at once, or the ports given as
+                                        'ports=' after the flags, without the tkinter window. See function
+                                        headless_devices():
+                                            python arduino_main.py -m ports=COM3,COM4 duration=60
+                    batch '-b'          summarise every session in 'results' in parallel and print them as one
+                                        comparison table, see lib/batch.py. Summaries are cached in 'index'
+                                        under 'BATCH' in setup.ini so only new or changed files are loaded,
+                                        and the table is written to CSV when 'output=' follows the flags:
+                                            python arduino_main.py -b output=summary.csv
+                    verbose '-v'        print the statistics of every recording session when completed.
         
 
         class Main      parameter | tk.Tk:
             This is the main class that creates the tkinter framework window for the real-time serial data stream.
-            Here, 3 variable labels are created, Force, Newtons and Time, each of which changes in-response to the
-            incoming data stream. Some important variables are as followed:
+            Here, 6 variable labels are created, Force, Newtons, Time, Peak, Average and Impulse, each of which changes
+            in-response to the incoming data stream. Some important variables are as followed:
                 self.force      the variable label that changes depending on the level of force read from the incoming
                                 serial data stream.
                 self.newton     the variable label that changes depending on the calculated newton force read from the
                                 incoming serial data stream.
                 self.time       the variable label that changes according to the internal elapsed time of the Arduino
                                 read from the incoming serial data stream.
+                self.peak, self.average, self.impulse
+                                the variable labels showing the peak newtons, average newtons and force-time integral
+                                of the current recording session, updated live from conn.stats (lib/stats.py).
+                self.frame_peak the variable label showing the peak newtons since the previous frame, shown when
+                                'show_peak' under 'DISPLAY' in setup.ini is set.
+                self.auto_trigger
+                                the state of 'Auto Trigger' in Tools. Whilst checked, recording sessions are started
+                                and stopped by conn.trigger, class AutoTrigger in lib/trigger.py, rather than through
+                                'Record': a session starts when newtons reaches 'threshold' under 'TRIGGER' in
+                                setup.ini, beginning 'pre_trigger' ms before the crossing, and stops once newtons has
+                                stayed below the threshold for 'hold_off' ms. 'Record' is disabled whilst armed.
 
 
         class PortsMenu()       parameters | tk.Tk
@@ -73,54 +119,97 @@ CREDIT: Program created by Ethan Smith-Coss
 
         function optionmenu_onchange        parameters  | self, event       belongs to | PortsMenu
             This function is responsible for listening and responding to when the user selects a item from the Tkinter
-            OptionMenu. Then global variable conn.port is updated to the newly selected COM port and if the connection
-            is not lost, determined via global variable conn.connection_lost, the global function conn.connect is called
-            to re-establish a new connect under the newly redefined variables.
-            If a connection is unsuccessful, this process should occur again and user should selected a different COM port.
+            OptionMenu. Then global variable conn.port is updated to the newly selected COM port, the remembered
+            fingerprint is forgotten so the chosen port is tried by name, and conn.supervisor is woken to connect to it.
+            If the port cannot be opened the supervisor keeps retrying it with its backoff until it can, or until the
+            user selects a different COM port.
+
+
+        class DiagnosticsPanel()    parameters | tk.Toplevel
+            This class is a window opened through 'Diagnostics' in Options showing the counters and timers of the
+            acquisition hot path kept in conn.diagnostics (lib/diagnostics.py): bytes read, samples parsed, lines or
+            frames rejected, ring buffer overruns, gaps in the millis() sequence, and the time spent reading, parsing
+            and updating the window along with the scheduling lag of main(). The counters are refreshed every 500ms
+            and can be dumped to a JSON file through the 'Dump' button.
+
+
+        function headless()     belongs to | module
+            This function replaces the tkinter window and main() when the '-h' flag is given. A recording session
+            is started straight away and the ring buffer is drained every 50ms through the same handle_samples()
+            used by main(), so parsing and recording are identical to the window. The session stops after
+            'duration=' seconds, 'samples=' samples or on SIGINT/SIGTERM, whichever comes first, and with
+            'stdout' every sample is also written to stdout as force,newtons,time. With 'trigger' the recording is
+            started and stopped by the auto trigger instead, one CSV file per session, as 'Auto Trigger' in Tools.
+            Once stopped, the ring buffer is drained one last time so no sample already read is left unrecorded.
+            Status messages, such as the start and end of every session, are written to stderr so that stdout
+            only ever holds samples and can be piped straight into another program.
+
+
+        function headless_devices()     belongs to | module
+            This function replaces the tkinter window and main() when the '-m' flag is given, acquiring from several
+            Arduinos at once through conn.devices, class DeviceGroup in lib/devices.py. Every device is read on its own
+            SerialReader thread into its own ring buffer and recorded to its own results/session_<id>_<port>.csv file, so
+            the devices never wait on each other. The devices are drained together every 50ms and with 'stdout' the
+            samples of all devices are written to stdout as device,force,newtons,time, merged in order of time aligned
+            to the clock of the host. Options are the same as for function headless(), 'samples=' counting the samples
+            of all devices: exactly that many are recorded, the earliest by aligned time when the limit falls within
+            a batch. Status messages are written to stderr, as by headless(). The filters and pulse detection under
+            'DSP' in setup.ini are applied to every device by a Pipeline of its own, before the samples are recorded,
+            and every pulse is reported with the name of its device.
 
 
         function main()     belongs to | module         NOTE | Not to be confused with the class Main
-            This function is responsible for reading the incoming byte serial data stream and decoding using UTF-8. Once
-            the read line is decoded, the data is then split according to all non-alphabetical characters, leaving only
-            integers and floats. If the incoming data is different to that stored temporarily in the log, the newly incoming
-            data that was split is assigned to the variable labels found in class Main, showing a real-time display of the
-            incoming data, however if the incoming data is not different then the data is ingnored to increase system performance.
+            This function is responsible for displaying and recording the incoming serial data stream. The serial port
+            itself is read on a background thread, class SerialReader in lib/acquisition.py, which drains every byte
+            waiting on the port in one read, parses the complete lines as a batch and pushes the samples into a bounded
+            ring buffer, conn.buffer. On each tick this function drains all samples
+            received since the last tick and appends them to the recording if one is in progress. The variable labels
+            found in class Main are only redrawn at 'refresh' frames per second under 'DISPLAY' in setup.ini, 30 by
+            default: between frames Main.coalesce() keeps the latest sample and the peak since the last frame, and
+            Main.draw() sets only the labels whose text has changed. Repainting the window therefore never throttles
+            or drops serial data; if the window stalls for longer than the ring buffer can hold, the oldest samples
+            are overwritten and counted in conn.buffer.overruns.
             Some notable features of this function:
-                msglog                  a variable to temporarily hold the last read data from the
-                                        serial data stream. Log is updated before the next line is
-                                        read from the serial data stream.
-                ard_msg                 reads the next incoming line of byte data from the serial
-                                        serial data stream and decodes the data with UTF-8 encoding
-                msg                     a string list of all digital values read from the decoded 
-                                        serial data stream. The data is split according to if the
-                                        characters are not alphabetical characters meaning only
-                                        integer and floats are read; the data is split into 3 different
-                                        items corresponding to force, newtons and time.
+                conn.reader             the background thread reading the serial data stream. When the
+                                        connection to the Arduino is lost the thread wakes the
+                                        reconnection supervisor, conn.supervisor, and exits.
+                conn.buffer             the ring buffer holding force, newtons and time for every
+                                        sample that has not been displayed yet.
+                conn.diagnostics        the counters of the acquisition hot path. This function
+                                        records the lag and duration of every tick and prints a
+                                        stats line every 'interval' seconds under 'DIAGNOSTICS' in
+                                        setup.ini.
 
                 After 5ms the function is called again via the Tkinter after() method.
                 This function occurs in parallel with class Main, which initiates this
                 function.
-                
-                Caught exceptions that are ignored: UnicodeDecodeError, UnboundLocalError
-                Caught exceptions that are handled: AttributeError, Serial.SerialException
 
 """
 
-import csv
 import sys, os
+import signal
 import threading
 import configparser
+import time as _time
 import tkinter as tk
 
 try:
     import serial
 except ModuleNotFoundError as e:
-    print("The following module could not be found:", e)
-    quit()
+    raise ImportError(f"arduino_main requires {e.name}, install it with: pip install pyserial") from e
 
 from tkinter import ttk
 from serial.tools import list_ports
-from lib.graph_plotter import PlotGraph
+from lib.acquisition import RingBuffer, SerialReader
+from lib.line_parser import LineDecoder
+from lib.protocol import FrameDecoder
+from lib.recorder import StreamingWriter
+from lib.stats import RunningStats
+from lib.diagnostics import Diagnostics
+from lib.devices import DeviceGroup
+from lib.supervisor import Fingerprint, Supervisor
+from lib.trigger import AutoTrigger
+from lib.catalog import Catalog
 from tkinter import messagebox, filedialog
 
 
@@ -128,8 +217,8 @@ config = configparser.ConfigParser()
 config.read('setup.ini')
 
 recording = False
-records = []
-dump_val = int(config['SETUP']['count'])
+session = None
+session_id = None
 
 def restart():
     """Restart the program.\n
@@ -142,7 +231,7 @@ def restart():
                                                                     "Do you wish to continue?"):
         # This function restarts the program.
         # NOTE: All data will be lost of not saved!
-        print(f"Restarting Arduino on {conn.port}:{conn.bps}...")
+        print(f"Restarting Arduino on {conn.port}:{conn.bps}...", file=sys.stderr)
         os.system('cls')
         python = sys.executable
         os.execl(python, python, * sys.argv)             
@@ -151,12 +240,13 @@ def restart():
 
 
 def write_to_config(p, bps):
-    print("Writing to file...")
+    print("Writing to file...", file=sys.stderr)
     with open("setup.ini", 'w') as ini_file:
-        config['SETUP'] = {
-            'port':p,
-            'bps':bps,
-            'count':dump_val}
+        # Update the keys in place so that optional settings, such as 'mode', are kept
+        config['SETUP']['port'] = str(p)
+        config['SETUP']['bps'] = str(bps)
+        # Sessions are named from the catalog, the old counter is no longer kept
+        config['SETUP'].pop('count', None)
 
         config.write(ini_file)
 
@@ -164,64 +254,106 @@ def write_to_config(p, bps):
 def record(menu):
     """Called from class Main() through 'Record' in Tools. Create a recording session where data is collected
     and allow for 'Record' to be toggled between starting and stoping.\n
-    Data is automatically written to CSV on session end."""
-
-    global recording, records
+    Data is written to CSV whilst recording and the file is completed on session end."""
 
     if not recording:
-        print("Recording Enabled...")
         for m in menu:
             m.entryconfigure(0, label="Stop Recording")
         
-        records.clear()
-        conn.init_time = 0
-        recording = True
+        start_recording()
     else:
-        print("Recording Disabled...")
         for m in menu:
             m.entryconfigure(0, label="Record")
         
-        dump_data()
-        recording = False
+        stop_recording()
+
+
+def start_recording():
+    """Start a recording session, data is streamed to results/session_<id>.csv with the next ID of the session
+    catalog, or session_<id>.fcs or session_<id>.fcm when recording in the compact or mapped format."""
+
+    global recording, session, session_id
+
+    print("Recording Enabled...", file=sys.stderr)
+    try:
+        verbose = 'v' in conn.cmd_args or 'verbose' in conn.cmd_args
+    except TypeError:
+        verbose = False
+
+    conn.stats.reset()
+    if conn.format == 'compact':
+        # Imported on demand, the compact format pulls in NumPy
+        from lib.compact import CompactWriter, EXTENSION
+        writer, extension = CompactWriter, EXTENSION
+    elif conn.format == 'mapped':
+        from lib.mapped import MappedWriter, EXTENSION
+        writer, extension = MappedWriter, EXTENSION
+    else:
+        writer, extension = StreamingWriter, '.csv'
+
+    session_id, path = conn.catalog.allocate('results', extension, conn.port)
+    print(f"Recording into {os.path.basename(path)}", file=sys.stderr)
+    session = writer(path, conn.stats, verbose=verbose)
+    conn.init_time = None
+    recording = True
+
+
+def stop_recording():
+    """Stop the recording session, the CSV file is completed in the background."""
+
+    global recording
+
+    print("Recording Disabled...", file=sys.stderr)
+    recording = False
+    dump_data()
         
 
+def auto_trigger():
+    """Called from class Main() through 'Auto Trigger' in Tools, and by headless() with 'trigger'.\n
+    Arm the auto trigger when checked, or disarm it, completing any session it has started."""
+
+    if conn.trigger is None:
+        if recording:
+            # A manual recording in progress is completed first
+            record(conn.app.record_menus) if not conn.headless else stop_recording()
+
+        trigger = config['TRIGGER'] if config.has_section('TRIGGER') else {}
+        conn.trigger = AutoTrigger(start_recording, record_samples, stop_recording,
+                                   threshold=float(trigger.get('threshold', 0.5)),
+                                   pre_trigger=int(trigger.get('pre_trigger', 500)),
+                                   hold_off=int(trigger.get('hold_off', 1000)))
+        print(f"Auto trigger armed at {conn.trigger.threshold} N...", file=sys.stderr)
+        state = "disabled"
+    else:
+        conn.trigger.disarm()
+        conn.trigger = None
+        print("Auto trigger disarmed...", file=sys.stderr)
+        state = "normal"
+
+    if not conn.headless:
+        for m in conn.app.record_menus:
+            m.entryconfigure(0, state=state)
+
+
 def dump_data():
     """Called after a recording session is completed.\n
-    Collected data is written to CSV file."""
+    The remaining data and the peak/average summary are written to the CSV file in the background."""
 
-    global dump_val
-    
-    if len(records) > 0:
-        try: 
-            if 'v' in conn.cmd_args or 'verbose' in conn.cmd_args:
-                print(f"Gathered recordings: {records}")
-                print(f"Peak value: {max(records)[0]}")
-        except: pass
-
-        average_value = 0
-        for i in records:
-            average_value += float(i[1])
-
-        average = round(float(average_value / len(records)), 2)
-        
-        try: 
-            if 'v' in conn.cmd_args or 'verbose' in conn.cmd_args:
-                print(f"Average value: {average}")
-        except: pass
-
-        print(f"\nDumping recordings into data_{dump_val}.csv")
-        with open(f"results/data_{dump_val}.csv", 'w', newline='') as csvfile:
-            fieldnames = ['force', 'newtons', 'time', 'peak', 'average']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for item in records:
-                writer.writerow({'force': item[0], 'newtons': item[1], 'time': item[2]})
-            
-            writer.writerow({'peak': max(records)[1], 'average': average})
-            dump_val += 1
-    else:
-        return
+    global session
+
+    if session is not None:
+        print(f"\nCompleting recordings in {os.path.basename(session.path)}", file=sys.stderr)
+        conn.catalog.complete(session_id, conn.stats)
+        session.close()
+        session = None
+
+
+def save_data():
+    """Called from class Main() through 'Save' in File.\n
+    Write all data collected so far in the recording session to disk."""
+
+    if session is not None:
+        session.flush()
 
 
 def open_dump():
@@ -235,12 +367,33 @@ def open_dump():
         return
 
 
+def live_plot():
+    """Called from class Main() through 'Live Plot' in Tools. Open a live plot of the incoming data stream."""
+
+    try:
+        # Imported on demand, the plot pulls in NumPy and matplotlib
+        from lib.live_plot import LivePlot
+    except ImportError as e:
+        messagebox.showerror("Live Plot", str(e))
+        return
+
+    live = config['LIVE'] if config.has_section('LIVE') else {}
+    LivePlot(conn.app, conn.subscribers, window=float(live.get('window', 10)), fps=int(live.get('fps', 30)))
+
+
 def plot_graph():
     """Called from class Main() through 'Plot Graph' in Tools. Select record to generate a graph from."""
     
-    filename = filedialog.askopenfilename(initialdir="./results", title="Open File...", filetypes=[("Text File","*.csv")]).split('/')
+    filename = filedialog.askopenfilename(initialdir="./results", title="Open File...", filetypes=[("Session File","*.csv *.fcs *.fcm")]).split('/')
     if not '' in filename:
-        graph = PlotGraph()
+        try:
+            # Imported on demand, the plotter pulls in NumPy, PyQt5 and matplotlib
+            from lib.graph_plotter import PlotGraph
+        except ImportError as e:
+            messagebox.showerror("Plot Graph", str(e))
+            return
+
+        graph = PlotGraph(catalog=conn.catalog)
         graph.plot(filename[-1])
         graph.show()
 
@@ -248,6 +401,22 @@ def plot_graph():
         return
 
 
+def batch_analysis():
+    """Called through the '-b' flag. Summarise every session in 'results' and print the comparison table."""
+
+    # Imported on demand, the analysis pulls in NumPy
+    from lib.batch import SummaryIndex, analyse, print_table, write_table
+
+    options = dict(arg.split('=', 1) if '=' in arg else (arg, '') for arg in sys.argv[2:])
+    batch = config['BATCH'] if config.has_section('BATCH') else {}
+
+    summaries = analyse('results', SummaryIndex(batch.get('index', 'batch_index.json')),
+                        float(batch.get('trigger', 0.5)))
+    print_table(summaries)
+    if options.get('output'):
+        write_table(summaries, options['output'])
+
+
 class Connect():
     """Initialise the serial connection to the selected Arduino.
     This is the main class when calling externally."""
@@ -256,11 +425,17 @@ class Connect():
         '''Setup for the application'''
         
         super(Connect, self).__init__()
-        global dump_val
 
         self.port = config['SETUP']['port']
         self.bps = int(config['SETUP']['bps'])
+        self.mode = config['SETUP'].get('mode', 'text')
+        self.format = config['SETUP'].get('format', 'csv')
         self.cmd_args = None
+        self.headless = False
+        self.multi = False
+        self.devices = None
+        catalog = config['CATALOG'] if config.has_section('CATALOG') else {}
+        self.catalog = Catalog(catalog.get('path', 'sessions.db'))
 
         try:
             get_args = list(sys.argv[1]); get_args.remove('-') if '-' in get_args else None
@@ -270,55 +445,166 @@ class Connect():
             self.cmd_args = get_args
             self.flags(get_args)
 
-            return
+            if not self.headless:
+                return
 
-        print("Firing up initialisation...")
+        print("Firing up initialisation...", file=sys.stderr)
 
         self.connection_lost = False
         self.ports_list = []
-        self.init_time = 0
+        self.fingerprint = Fingerprint.from_config(config['DEVICE']) if config.has_section('DEVICE') else None
+        self.init_time = None
+        self.buffer = RingBuffer()
+        self.reader = None
+        self.stats = RunningStats()
+        self.subscribers = []
+        self.trigger = None
+        self.dsp = None
+        self.publisher = None
+        self.diagnostics = Diagnostics()
+        self.next_tick = None
+        # Seconds between stats lines printed to the console, 0 to disable
+        self.report_interval = float(config['DIAGNOSTICS'].get('interval', 0)) if config.has_section('DIAGNOSTICS') else 0
+        self.next_report = _time.perf_counter() + self.report_interval if self.report_interval > 0 else None
+
+        dsp = config['DSP'] if config.has_section('DSP') else {}
+        if dsp.get('filters') or dsp.get('event_threshold'):
+            # Imported on demand, the filters pull in NumPy
+            from lib.dsp import from_config
+            self.dsp = from_config(dsp, on_event=report_event)
+
+        if self.multi:
+            self.start_devices()
+            return
+
+        publish = config['PUBLISH'] if config.has_section('PUBLISH') else {}
+        if publish.get('address'):
+            # Imported on demand, only when other processes are to be sent the samples
+            from lib.publisher import Publisher
+            self.publisher = Publisher(publish['address'], int(publish.get('queue', 64)))
+            self.publisher.start()
+            self.subscribers.append(self.publisher.publish)
+            print(f"Publishing samples on {self.publisher.address}", file=sys.stderr)
+
+        if not self.headless:
+            self.app = Main()
+
+        backoff = config['RECONNECT'] if config.has_section('RECONNECT') else {}
+        self.supervisor = Supervisor(self, float(backoff.get('initial', 0.1)), float(backoff.get('maximum', 5)),
+                                     self.diagnostics)
+        self.supervisor.start()
+
+    def start_devices(self):
+        """Open every detected port, or the ports given as 'ports=' after the flags, as a DeviceGroup."""
+
+        options = dict(arg.split('=', 1) if '=' in arg else (arg, '') for arg in sys.argv[2:])
+        if options.get('ports'):
+            self.ports_list = options['ports'].split(',')
+        else:
+            self.ports_list = [com_port.device for com_port in list_ports.comports()]
+
+        if not self.ports_list:
+            print("No COM ports were found, connect the Arduinos via USB and try again.", file=sys.stderr)
+            sys.exit(1)
+
+        print(f"Acquiring from {len(self.ports_list)} ports: {', '.join(self.ports_list)}", file=sys.stderr)
+        pipeline = None
+        if self.dsp is not None:
+            # The filters and pulse detector keep state between batches, so every device is given its own
+            from lib.dsp import from_config
+            pipeline = lambda name: from_config(config['DSP'], on_event=lambda event: report_event(event, name))
 
-        self.app = Main()
-        self.connect()
+        backoff = config['RECONNECT'] if config.has_section('RECONNECT') else {}
+        self.devices = DeviceGroup(self.ports_list, self.bps, self.mode, float(backoff.get('initial', 0.1)),
+                                   float(backoff.get('maximum', 5)), pipeline)
 
-    def connect(self):
+    def connect(self, port=None):
+        port = self.port if port is None else port
         self.get_ports = list_ports.comports()
-        try:
-            self.arduino = serial.Serial(self.port, self.bps, timeout=.1)
-        except serial.SerialException:
-            print(f"\nArduino not found on {self.port}:{self.bps}!\nPlease change the port under Options when the application loads."\
-                    "\nReconnecting in 10 seconds...")
-            self.app.after(10**4, self.connect)
-            self.connection_lost = True
-        else:
-            print(f"Arduino found on {self.port}:{self.bps}")
-            self.connection_lost = False
+        if self.reader is not None:
+            self.reader.stop()
+            self.reader.join()
+            try:
+                # Release the old port, it cannot be reopened on some systems whilst still held
+                self.arduino.close()
+            except (OSError, serial.SerialException):
+                pass
+            self.reader = None
 
         for com_port in self.get_ports:
             if not list(com_port) in self.ports_list:
                 self.ports_list.append(list(com_port)[0])
 
+        try:
+            self.arduino = serial.Serial(port, self.bps, timeout=.1)
+        except serial.SerialException:
+            if not self.connection_lost:
+                # Only reported once, the supervisor keeps retrying in the background
+                print(f"\nArduino not found on {port}:{self.bps}!\nPlease change the port under Options when the application loads."\
+                        "\nReconnecting...", file=sys.stderr)
+            self.connection_lost = True
+            return False
+
+        print(f"Arduino found on {port}:{self.bps}", file=sys.stderr)
+        self.connection_lost = False
+        self.buffer.clear()
+        decoder = FrameDecoder() if self.mode == 'binary' else LineDecoder()
+        self.diagnostics.decoder = decoder; self.diagnostics.buffer = self.buffer
+        self.reader = SerialReader(self.arduino, self.buffer, decoder, self.diagnostics, on_lost=self.lost)
+        self.reader.start()
+
+        # Remember where the Arduino is and what it is, so it is found again on whichever port it reappears
+        fingerprint = Fingerprint.of(port) or self.fingerprint
+        if port != self.port or fingerprint != self.fingerprint:
+            self.port, self.fingerprint = port, fingerprint
+            if fingerprint is not None:
+                config['DEVICE'] = fingerprint.as_config()
+            write_to_config(self.port, self.bps)
+        return True
+
+    def lost(self):
+        """Called from the reader thread when the connection to the Arduino is lost."""
+
+        print(f"\nConnection to Arduino was lost on {self.port}:{self.bps}!\nReconnecting to Arduino...",
+              file=sys.stderr)
+        self.connection_lost = True
+        self.ports_list.clear()
+        self.supervisor.lost()
+
     
     def flags(self, flag_list):
-        global dump_val
-
         for flag in flag_list:
             if flag == 'f' or flag == 'flush':
-                print("Removing all files in 'results'...")
+                print("Removing all files in 'results'...", file=sys.stderr)
                 folder = f"{os.path.dirname(os.path.realpath(__file__))}/results"
                 for filename in os.listdir(folder):
                     path_to_file = os.path.join(folder, filename)
                     os.unlink(path_to_file)
 
-                print("All files have been deleted.") if len(os.listdir(folder)) == 0 else print("Not all files could be removed.")
+                print("All files have been deleted." if len(os.listdir(folder)) == 0 else "Not all files could be removed.",
+                      file=sys.stderr)
+                self.catalog.prune()
                 
             elif flag == 'r' or flag == 'reset':
-                print("Resetting 'setup.ini'...")
-                dump_val = 0
+                print("Resetting 'setup.ini'...", file=sys.stderr)
                 write_to_config(self.port, self.bps)
+
+            elif flag == 'h' or flag == 'headless':
+                self.headless = True
+
+            elif flag == 'm' or flag == 'multi':
+                self.headless = True
+                self.multi = True
+
+            elif flag == 'b' or flag == 'batch':
+                batch_analysis()
+
+            elif flag == 'v' or flag == 'verbose':
+                # Checked through self.cmd_args when a recording is completed
+                pass
             
             else:
-                print(flag + ", is an invalid flag.")
+                print(flag + ", is an invalid flag.", file=sys.stderr)
 
 
 class Main(tk.Tk):
@@ -334,6 +620,20 @@ class Main(tk.Tk):
         self.force = tk.StringVar()
         self.newton = tk.StringVar()
         self.time = tk.StringVar()
+        self.peak = tk.StringVar()
+        self.average = tk.StringVar()
+        self.impulse = tk.StringVar()
+        self.frame_peak = tk.StringVar()
+        self.auto_trigger = tk.BooleanVar()
+
+        # Samples are coalesced between frames, see coalesce() and draw()
+        display = config['DISPLAY'] if config.has_section('DISPLAY') else {}
+        self.frame_interval = 1 / float(display.get('refresh', 30))
+        self.show_peak = display.get('show_peak', 'no').lower() in ('yes', 'true', 'on', '1')
+        self.next_frame = 0.0
+        self.latest = None
+        self.peak_since_frame = None
+        self.shown = {}
 
         # Create Menu
         menubar = tk.Menu(self)
@@ -344,12 +644,13 @@ class Main(tk.Tk):
         menu_win.add_command(label="Record", command=lambda: record([menu_win, toolmenu]))
 
         filemenu = tk.Menu(menubar, tearoff=0)
-        filemenu.add_command(label="Save", command=dump_data)
+        filemenu.add_command(label="Save", command=save_data)
         filemenu.add_command(label="Open", command=open_dump)
 
         optionmenu = tk.Menu(menubar, tearoff=0)
         # Call class to load PortsMenu
         optionmenu.add_command(label="Port", command=PortsMenu)
+        optionmenu.add_command(label="Diagnostics", command=DiagnosticsPanel)
         optionmenu.add_separator()
         optionmenu.add_command(label="Restart", command=restart)
         optionmenu.add_command(label="Close Connection", command=self.quit)
@@ -357,6 +658,12 @@ class Main(tk.Tk):
         toolmenu = tk.Menu(menubar, tearoff=0)
         toolmenu.add_command(label="Record", command=lambda: record([toolmenu, menu_win]))
         toolmenu.add_command(label="Plot Graph", command=plot_graph)
+        toolmenu.add_command(label="Live Plot", command=live_plot)
+        toolmenu.add_separator()
+        toolmenu.add_checkbutton(label="Auto Trigger", variable=self.auto_trigger, command=auto_trigger)
+
+        # Entry 0 of both is 'Record', relabelled by record() and disabled whilst the auto trigger is armed
+        self.record_menus = [menu_win, toolmenu]
 
         menubar.add_cascade(label="File", menu=filemenu)
         menubar.add_cascade(label="Options", menu=optionmenu)
@@ -374,12 +681,27 @@ class Main(tk.Tk):
         force_lbl = tk.Label(self, textvariable=self.force)
         netwon_lbl = tk.Label(self, textvariable=self.newton)
         time_lbl = tk.Label(self, textvariable=self.time)
+        # Statistics of the recording session
+        lbl4 = tk.Label(self, text="Peak:")
+        lbl5 = tk.Label(self, text="Average:")
+        lbl6 = tk.Label(self, text="Impulse:")
+        peak_lbl = tk.Label(self, textvariable=self.peak)
+        average_lbl = tk.Label(self, textvariable=self.average)
+        impulse_lbl = tk.Label(self, textvariable=self.impulse)
 
         lbl1.pack(side="left", pady=10, ipadx=5); force_lbl.pack(side="left",ipadx=5)
         lbl2.pack(side="left"); netwon_lbl.pack(side="left",ipadx=5)
         lbl3.pack(side="left"); time_lbl.pack(side="left",ipadx=5)
+        lbl4.pack(side="left"); peak_lbl.pack(side="left",ipadx=5)
+        lbl5.pack(side="left"); average_lbl.pack(side="left",ipadx=5)
+        lbl6.pack(side="left"); impulse_lbl.pack(side="left",ipadx=5)
+        if self.show_peak:
+            lbl7 = tk.Label(self, text="Max:")
+            frame_peak_lbl = tk.Label(self, textvariable=self.frame_peak)
+            lbl7.pack(side="left"); frame_peak_lbl.pack(side="left",ipadx=5)
 
         self.force.set("0"); self.newton.set("0"); self.time.set("0")
+        self.peak.set("0"); self.average.set("0"); self.impulse.set("0")
 
         def popup(event):
             """Local function. Called on user right-click"""
@@ -387,6 +709,37 @@ class Main(tk.Tk):
 
         self.bind("<Button-3>", popup)
 
+    def coalesce(self, force, newtons, times):
+        """Keep the latest sample and the peak newtons of a batch until the next frame is drawn."""
+
+        self.latest = (force[-1], newtons[-1], times[-1])
+        peak = max(newtons)
+        if self.peak_since_frame is None or peak > self.peak_since_frame:
+            self.peak_since_frame = peak
+
+    def draw(self):
+        """Show the coalesced samples on the labels. Labels whose text has not changed are not set again, so
+        Tk only lays out what has changed."""
+
+        texts = []
+        if self.latest is not None:
+            force, newton, time = self.latest
+            texts += [(self.force, f"{force:.1f}"), (self.newton, f"{newton:.2f}"), (self.time, str(time))]
+        if self.peak_since_frame is not None:
+            texts.append((self.frame_peak, f"{self.peak_since_frame:.2f}"))
+        if recording:
+            texts += [(self.peak, f"{conn.stats.max:.2f}"), (self.average, f"{conn.stats.mean:.2f}"),
+                      (self.impulse, f"{conn.stats.impulse:.3f}")]
+
+        # Keyed by the Tcl name of each variable, tk variables are not hashable
+        for variable, text in texts:
+            if self.shown.get(str(variable)) != text:
+                variable.set(text)
+                self.shown[str(variable)] = text
+
+        self.latest = None
+        self.peak_since_frame = None
+
 
 class PortsMenu(tk.Tk):
     """Allow selection of a different Arduino.\n
@@ -442,61 +795,281 @@ class PortsMenu(tk.Tk):
    
 
     def optionmenu_onchange(self, event):
-        """Local callback - changes the serial port."""
+        """Local callback - changes the serial port. The connection is made by conn.supervisor, never on the
+        tkinter thread, so a port that cannot be opened is retried like a lost connection."""
         self.update_ports_list()
 
-        conn.port = event
-        if not conn.connection_lost:
-            print(f"Reconnecting on {conn.port}:{conn.bps}...")
-            conn.connect()
+        print(f"Reconnecting on {event}:{conn.bps}...", file=sys.stderr)
+        # A port chosen by hand is tried by name, the fingerprint of the board on it is taken once connected
+        conn.port, conn.fingerprint = event, None
+        config.remove_section('DEVICE')
+        conn.supervisor.lost()
+
+
+class DiagnosticsPanel(tk.Toplevel):
+    """Show the counters of conn.diagnostics, refreshed every 500ms.\n
+        Not to be called externally and triggered through selecting 'Diagnostics' in Options."""
+
+    def __init__(self, *args, **kwargs):
+        """Setup initialisation."""
+
+        super().__init__(conn.app)
+
+        tk.Toplevel.wm_title(self, "Diagnostics")
+        tk.Toplevel.wm_resizable(self, False, False)
+
+        self.text = tk.StringVar(self)
+        text_lbl = ttk.Label(self, textvariable=self.text, justify="left", font="TkFixedFont")
+        text_lbl.pack(padx=10, pady=10)
+
+        dump_btn = ttk.Button(self, text="Dump", command=self.dump)
+        dump_btn.pack(pady=(0, 10))
+
+        self.refresh()
+
+
+    def refresh(self):
+        """Local function. Update the panel with the latest counters."""
+
+        d = conn.diagnostics.snapshot()
+        rows = [("Uptime", f"{d['uptime_s']:.0f} s"),
+                ("Bytes read", d['bytes_read']),
+                ("Samples parsed", d['samples']),
+                ("Rejected lines/frames", d['rejected']),
+                ("Ring buffer overruns", d['overruns']),
+                ("millis() gaps/resets", f"{d['millis_gaps']} / {d['millis_resets']}"),
+                ("Read time", f"{d['read']['mean_ms']:.2f} ms mean"),
+                ("Parse time", f"{d['parse']['mean_ms']:.3f} ms mean, {d['parse']['max_ms']:.2f} ms max"),
+                ("UI update time", f"{d['ui']['mean_ms']:.3f} ms mean, {d['ui']['max_ms']:.2f} ms max"),
+                ("Tick lag", f"{d['tick_lag']['mean_ms']:.2f} ms mean, {d['tick_lag']['max_ms']:.2f} ms max"),
+                ("Reacquire time", f"{d['reacquire']['count']} times, {d['reacquire']['max_ms']:.0f} ms max")]
+        self.text.set("\n".join(f"{name:<24}{value}" for name, value in rows))
+
+        self._job = self.after(500, self.refresh)
+
+
+    def destroy(self):
+        """Stop refreshing when the panel is closed, or with the main window, the pending refresh would otherwise
+        outlive it."""
+
+        self.after_cancel(self._job)
+        super().destroy()
+
+
+    def dump(self):
+        """Local callback. Write the counters to a JSON file."""
+
+        filename = filedialog.asksaveasfilename(parent=self, initialdir="./", initialfile="diagnostics.json",
+                                                title="Dump Diagnostics...", filetypes=[("JSON File", "*.json")])
+        if not filename == '':
+            conn.diagnostics.dump(filename)
+            print(f"Diagnostics written to {filename}", file=sys.stderr)
+
+
+def record_samples(force, newtons, times):
+    """Append a batch of samples to the recording session in progress, with time relative to its first sample."""
+
+    if conn.init_time is None:
+        conn.init_time = times[0]
+    relative = [t - conn.init_time for t in times]
+    conn.stats.update(newtons, relative)
+    session.extend(force, newtons, relative)
+
+
+def report_event(event, device=None):
+    """Called by the pulse detector of conn.dsp, or of a device in conn.devices, when a pulse has ended."""
+
+    print(f"[event{' ' + device if device else ''}] peak {event.peak:.2f} N at {event.peak_time} ms, rise {event.rise_time} ms, "
+          f"width {event.width} ms", file=sys.stderr)
+
+
+def handle_samples(force, newtons, times):
+    """Filter a batch of samples drained from conn.buffer through conn.dsp, record it and pass it to every
+    subscriber. Returns the filtered newtons.\n
+    Shared by main() and headless() so both record the same way."""
+
+    if conn.dsp is not None:
+        newtons = conn.dsp.process(newtons, times)
+
+    if conn.trigger is not None:
+        # Sessions are started, recorded and stopped by the trigger
+        conn.trigger.feed(force, newtons, times)
+    elif recording:
+        record_samples(force, newtons, times)
+
+    for callback in conn.subscribers:
+        callback(force, newtons, times)
+
+    return newtons
 
 
 def main():
     """Main function to be called after the tkinter window has loaded.\n
     Real-Time data stream from Arduino and displayed to the tkinter window."""
 
-    msglog = ''
-    try:
-        try:
-            ard_msg = conn.arduino.readline().decode('utf-8')
-        except (AttributeError, serial.SerialException):
-            if not conn.connection_lost:
-                print(f"\nConnection to Arduino was lost on {conn.port}:{conn.bps}!\nReconnecting to Arduino in 10 seconds...")
-                conn.connection_lost = True
-                conn.ports_list.clear()
-                threading.Timer(10.0, conn.connect).start()
-    except UnicodeDecodeError:
-        pass
-    
-    try:
-        if ard_msg[:-4] != msglog: 
-            msg = [str(s) for s in ard_msg.split() if not any(char.isalpha() for char in s)]
-            if recording:
-                if conn.init_time == 0:
-                    conn.init_time = int(msg[2])
-                else:
-                    records.append([float(msg[0]), float(msg[1]), int(msg[2]) - conn.init_time])
-
-            conn.app.force.set(msg[0]); conn.app.newton.set(msg[1]); conn.app.time.set(msg[2])
-    except UnboundLocalError:
-        pass
-    else:
-        msglog = ard_msg
+    start = _time.perf_counter()
+
+    force, newtons, times = conn.buffer.drain()
+    if len(times) > 0:
+        newtons = handle_samples(force, newtons, times)
+        conn.app.coalesce(force, newtons, times)
 
+    # The labels are redrawn at the refresh rate of the display, not on every tick
+    if start >= conn.app.next_frame:
+        conn.app.draw()
+        conn.app.next_frame = start + conn.app.frame_interval
 
+    # Scheduling lag is how late this tick started compared to when it was asked for
+    end = _time.perf_counter()
+    conn.diagnostics.on_tick(start - conn.next_tick if conn.next_tick is not None else 0.0, end - start)
+    if conn.next_report is not None and end >= conn.next_report:
+        print(conn.diagnostics.line(), file=sys.stderr)
+        conn.next_report = end + conn.report_interval
+
+    conn.next_tick = end + 0.005
     conn.app.after(5, main)
 
 
+def headless_options():
+    """Read the options of headless() and headless_devices() given after the flags.\n
+    Returns duration, samples, stdout and an Event set on SIGINT/SIGTERM."""
+
+    options = dict(arg.split('=', 1) if '=' in arg else (arg, '') for arg in sys.argv[2:])
+    duration = float(options['duration']) if 'duration' in options else None
+    samples = int(options['samples']) if 'samples' in options else None
+    to_stdout = 'stdout' in options
+
+    stop = threading.Event()
+    def on_signal(signum, frame):
+        """Local function. Called on SIGINT/SIGTERM."""
+        stop.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    return duration, samples, to_stdout, stop
+
+
+def headless():
+    """Acquisition without the tkinter window, selected with the '-h' flag.\n
+    Records straight to CSV until the duration or sample count given on the command line is reached or the
+    process receives SIGINT/SIGTERM. Options follow the flags as name=value pairs:
+        duration=<seconds>      stop after this many seconds
+        samples=<count>         stop after this many samples
+        stdout                  also write every sample to stdout as force,newtons,time
+        trigger                 record the sessions started and stopped by the auto trigger, samples= is ignored"""
+
+    duration, samples, to_stdout, stop = headless_options()
+
+    if 'trigger' in sys.argv[2:]:
+        auto_trigger()
+    else:
+        start_recording()
+    started = _time.perf_counter()
+    # The buffer is drained far less often than by main(), there is no window to keep responsive. Once stopped it
+    # is drained one last time, so the samples that arrived since the previous pass are recorded too
+    stopping = False
+    while not stopping:
+        stopping = stop.wait(0.05)
+        force, newtons, times = conn.buffer.drain()
+        if samples is not None and conn.trigger is None and conn.stats.count + len(times) >= samples:
+            keep = samples - conn.stats.count
+            force, newtons, times = force[:keep], newtons[:keep], times[:keep]
+            stop.set()
+
+        if len(times) > 0:
+            newtons = handle_samples(force, newtons, times)
+            if to_stdout:
+                sys.stdout.write(''.join(f"{f},{n},{t}\n" for f, n, t in zip(force, newtons, times)))
+                sys.stdout.flush()
+
+        now = _time.perf_counter()
+        if duration is not None and now - started >= duration:
+            stop.set()
+        if conn.next_report is not None and now >= conn.next_report:
+            print(conn.diagnostics.line(), file=sys.stderr)
+            conn.next_report = now + conn.report_interval
+
+    # Wait for the CSV file to be completed before the process exits
+    writer = session
+    if conn.trigger is not None:
+        auto_trigger()
+    elif recording:
+        stop_recording()
+    if writer is not None:
+        writer.join()
+
+
+def headless_devices():
+    """Acquisition from several Arduinos at once without the tkinter window, selected with the '-m' flag.\n
+    Every device is recorded to its own CSV file, the options are those of headless() with 'samples='
+    counting the samples of all devices and 'stdout' writing device,force,newtons,time."""
+
+    duration, samples, to_stdout, stop = headless_options()
+    devices = conn.devices
+
+    try:
+        verbose = 'v' in conn.cmd_args or 'verbose' in conn.cmd_args
+    except TypeError:
+        verbose = False
+
+    print("Recording Enabled...", file=sys.stderr)
+    devices.start_recording(conn.catalog, verbose=verbose)
+
+    started = _time.perf_counter()
+    # Drained one last time once stopped, as by headless()
+    stopping = False
+    while not stopping:
+        stopping = stop.wait(0.05)
+        # The last batch is cut to the samples still wanted, so no more than 'samples=' are ever recorded
+        batches = devices.poll(samples - devices.count if samples is not None else None)
+        if to_stdout:
+            device, force, newtons, time = devices.merge(batches)
+            if len(time) > 0:
+                sys.stdout.write(''.join(f"{devices.devices[d].name},{f},{n},{t}\n"
+                                         for d, f, n, t in zip(device, force, newtons, time)))
+                sys.stdout.flush()
+
+        now = _time.perf_counter()
+        if samples is not None and devices.count >= samples:
+            stop.set()
+        if duration is not None and now - started >= duration:
+            stop.set()
+        if conn.next_report is not None and now >= conn.next_report:
+            for device in devices.devices:
+                print(f"{device.name} {device.diagnostics.line()}", file=sys.stderr)
+            conn.next_report = now + conn.report_interval
+
+    print("Recording Disabled...", file=sys.stderr)
+    devices.stop_recording()
+    devices.close()
+
+
 if __name__ == "__main__":
     conn = Connect()
-    try:
-        conn.app.after(200, main)
-        conn.app.mainloop()
-    except:
-        sys.exit()
+    if conn.multi:
+        headless_devices()
+    elif conn.headless:
+        headless()
+    else:
+        try:
+            conn.app.after(200, main)
+            conn.app.mainloop()
+        except:
+            sys.exit()
+
+    if session is not None:
+        # Complete a recording still in progress when the window was closed
+        writer = session
+        dump_data()
+        writer.join()
 
-    print(f"Closing connection to {conn.port}:{conn.bps}...")
+    if conn.publisher is not None:
+        conn.publisher.close()
+    if not conn.multi:
+        conn.supervisor.stop()
+        print(f"Closing connection to {conn.port}:{conn.bps}...", file=sys.stderr)
     write_to_config(conn.port, conn.bps)
 
-print("Terminating process...")
-quit()
\ No newline at end of file
+    print("Terminating process...", file=sys.stderr)
+    sys.exit()
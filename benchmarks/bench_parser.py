@@ -0,0 +1,58 @@
+"""Micro-benchmark of the line parser in lib/line_parser.py against the original parsing in main().
+Run from the root of the repository:
+
+    python benchmarks/bench_parser.py [lines]
+
+The original implementation decoded every line to str, split it, filtered out tokens containing alphabetical
+characters and converted the tokens to float/int. It is reproduced below as legacy_parse() so the comparison
+does not depend on the git history.
+"""
+
+import os, sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from lib.line_parser import parse_line, parse_chunk
+
+
+def legacy_parse(line):
+    """The parsing done per line by main() before lib/line_parser.py existed."""
+
+    try:
+        ard_msg = line.decode('utf-8')
+        msg = [str(s) for s in ard_msg.split() if not any(char.isalpha() for char in s)]
+        return float(msg[0]), float(msg[1]), int(msg[2])
+    except (UnicodeDecodeError, ValueError, IndexError):
+        return None
+
+
+def make_lines(count):
+    """Generate lines in the format printed by force_meter.ino."""
+
+    lines = []
+    for i in range(count):
+        raw = random.randint(10, 60)
+        load = (4.9 - 0.98) / (57.0 - 22.0) * (raw - 22.0) + 0.98
+        lines.append(f"Reading: {raw:.1f} {load:.2f}  {i * 2}\n".encode())
+
+    return lines
+
+
+def report(name, seconds, count):
+    print(f"{name:<28}{count / seconds:>14,.0f} lines/s")
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lines = make_lines(count)
+    chunk = b''.join(lines)
+
+    assert [legacy_parse(l) for l in lines] == [parse_line(l) for l in lines]
+    assert list(zip(*parse_chunk(chunk))) == [legacy_parse(l) for l in lines]
+
+    print(f"Parsing {count} lines, best of 5 runs")
+    report("legacy (per line)", min(timeit.repeat(lambda: [legacy_parse(l) for l in lines], number=1, repeat=5)), count)
+    report("parse_line (per line)", min(timeit.repeat(lambda: [parse_line(l) for l in lines], number=1, repeat=5)), count)
+    report("parse_chunk (batch)", min(timeit.repeat(lambda: parse_chunk(chunk), number=1, repeat=5)), count)
@@ -0,0 +1,121 @@
+"""End-to-end throughput and latency benchmark of the acquisition path against an emulated Arduino.
+Run from the root of the repository, on a POSIX system:
+
+    python benchmarks/bench_pipeline.py [--modes text,binary] [--rates 100,1000,10000] [--seconds 5]
+                                        [--noise 0] [--corruption 0]
+
+For every mode and rate, lib/emulator.py writes samples to a pseudo-terminal and the real acquisition path,
+serial.Serial -> SerialReader -> decoder -> RingBuffer, reads them on its background thread whilst a consumer
+loop drains the ring buffer every 5 ms, as main() does in arduino_main.py, without a window. The emulator
+sends the index of each sample in place of millis() so that every sample can be accounted for. Reported are:
+
+    sent/received       samples written by the emulator and drained by the consumer
+    samples/s           sustained rate of samples drained
+    dropped             samples sent that never arrived, lost to pty overflow or corruption
+    duplicated          samples that arrived more than once
+    parse CPU           CPU time of the reader thread spent in the decoder, per 1000 samples
+    latency             percentiles of the time from the emulator writing a sample to the consumer draining it
+"""
+
+import os, sys
+import argparse
+import time as _time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import serial
+
+from lib.acquisition import RingBuffer, SerialReader
+from lib.emulator import EmulatedBoard
+from lib.line_parser import LineDecoder
+from lib.protocol import FrameDecoder
+
+TICK = 0.005
+
+
+class TimedDecoder():
+    """Wrap a decoder and add up the CPU time spent in it by the reader thread."""
+
+    def __init__(self, decoder):
+        self.decoder = decoder
+        self.cpu = 0.0
+
+    def feed(self, data):
+        start = _time.thread_time()
+        result = self.decoder.feed(data)
+        self.cpu += _time.thread_time() - start
+        return result
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else float('nan')
+
+
+def run(mode, rate, seconds, noise, corruption):
+    board = EmulatedBoard(mode, rate, noise, corruption, sequence=True, seed=0)
+    port = serial.Serial(board.port, 115200, timeout=.1)
+    buffer = RingBuffer()
+    decoder = TimedDecoder(FrameDecoder() if mode == 'binary' else LineDecoder())
+    reader = SerialReader(port, buffer, decoder)
+
+    reader.start()
+    board.start()
+    start = _time.perf_counter()
+
+    received, latencies = [], []
+    stopped = False
+    while True:
+        now = _time.perf_counter()
+        if not stopped and now - start >= seconds:
+            board.stop()
+            stopped, stopped_at = True, now
+        elif stopped and now - stopped_at >= 0.5:
+            break
+
+        force, newtons, times = buffer.drain()
+        sent_at = board.sent_at
+        for t in times:
+            if 0 <= t < len(sent_at):
+                latencies.append(now - sent_at[t])
+        received.extend(times)
+        _time.sleep(TICK)
+
+    reader.stop(); reader.join()
+    port.close(); board.close()
+
+    valid = [t for t in received if 0 <= t < board.sent]
+    unique = len(set(valid))
+    latencies.sort()
+    return {
+        'sent': board.sent,
+        'received': len(received),
+        'rate': len(received) / seconds,
+        'dropped': board.sent - unique,
+        'duplicated': len(valid) - unique,
+        'overflowed': board.overflowed,
+        'corrupted': board.corrupted,
+        'cpu': decoder.cpu / max(len(received), 1) * 10**6,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p95': percentile(latencies, 0.95) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'max': percentile(latencies, 1.0) * 1000,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', default='text,binary')
+    parser.add_argument('--rates', default='100,1000,10000')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--noise', type=float, default=0)
+    parser.add_argument('--corruption', type=float, default=0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'rate':>8}{'sent':>9}{'received':>10}{'samples/s':>11}{'dropped':>9}{'dup':>6}"
+          f"{'overflow B':>12}{'CPU ms/1k':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for mode in args.modes.split(','):
+        for rate in (int(r) for r in args.rates.split(',')):
+            r = run(mode, rate, args.seconds, args.noise, args.corruption)
+            print(f"{mode:<8}{rate:>8}{r['sent']:>9}{r['received']:>10}{r['rate']:>11.0f}{r['dropped']:>9}"
+                  f"{r['duplicated']:>6}{r['overflowed']:>12}{r['cpu']:>11.2f}{r['p50']:>9.1f}{r['p95']:>9.1f}"
+                  f"{r['p99']:>9.1f}{r['max']:>9.1f}")
@@ -0,0 +1,115 @@
+"""Benchmark of loading a session for PlotGraph.plot() with lib/session.py against the original loader.
+Run from the root of the repository:
+
+    python benchmarks/bench_plot_loader.py [rows]
+
+A synthetic session of 1,000,000 rows is written to a temporary file by default. The original loader, which
+read the file row by row with csv.DictReader and derived the summary values with list operations, is
+reproduced below as legacy_load() so the comparison does not depend on the git history. The session is then
+converted to the compact format of lib/compact.py and loaded again, to compare its load time and size, and to
+the mapped format of lib/mapped.py, which is opened without reading it and sliced to a 1 s window.
+"""
+
+import os, sys
+import csv
+import random
+import tempfile
+import time as _time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from lib.session import read_session
+from lib.compact import from_csv
+from lib.mapped import MappedSession, convert
+
+
+def legacy_load(datafile, trigger=0.5):
+    """The loading done by PlotGraph.plot() before lib/session.py existed."""
+
+    time, newtons = [], []
+    with open(datafile, newline='') as data_file:
+        reader = csv.DictReader(data_file)
+        for row in reader:
+            if not row['average'] == '':
+                average = float(row['average'])
+
+            if not row['peak'] == '':
+                peak = float(row['peak'])
+
+            if not row['time'] == '' or not row['newtons'] == '':
+                time.append(row['time'])
+                newtons.append(row['newtons'])
+
+    time = [float(x) for x in time]; newtons = [float(x) for x in newtons]
+    bounds = [n for n in newtons if n > trigger * 0.9]
+
+    refined_average = 0
+    for j in bounds:
+        refined_average += j
+
+    refined_average = round(refined_average / len(bounds), 2)
+    peak_time = time[newtons.index(peak)]
+    return peak, average, refined_average, peak_time, min(time), max(time)
+
+
+def new_load(datafile, trigger=0.5):
+    session = read_session(datafile)
+    refined_average = session.refined_average(trigger)
+    peak_time = session.time[session.peak_index()]
+    return session.peak, session.average, refined_average, peak_time, session.time[0], session.time[-1]
+
+
+def make_session(path, rows):
+    random.seed(0)
+    newtons = []
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['force', 'newtons', 'time', 'peak', 'average'])
+        for i in range(rows):
+            raw = random.randint(10, 60)
+            n = round((4.9 - 0.98) / (57.0 - 22.0) * (raw - 22.0) + 0.98, 2)
+            newtons.append(n)
+            writer.writerow([float(raw), n, i * 2, '', ''])
+        writer.writerow(['', '', '', max(newtons), round(sum(newtons) / rows, 2)])
+
+
+def timed(func, *args):
+    start = _time.perf_counter()
+    result = func(*args)
+    return _time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'data_0.csv')
+        make_session(path, rows)
+        print(f"Loading a session of {rows} rows ({os.path.getsize(path) / 2**20:.1f} MB)")
+
+        legacy_time, legacy = timed(legacy_load, path)
+        new_time, new = timed(new_load, path)
+        assert legacy[0] == new[0] and legacy[2] == new[2] and legacy[3] == new[3]
+
+        print(f"{'legacy (csv.DictReader)':<28}{legacy_time:>10.3f} s")
+        print(f"{'read_csv (NumPy)':<28}{new_time:>10.3f} s")
+        print(f"{'speedup':<28}{legacy_time / new_time:>10.1f} x")
+
+        compact = from_csv(path)
+        compact_time, compact_result = timed(new_load, compact)
+        assert compact_result[0] == new[0] and compact_result[2] == new[2] and compact_result[3] == new[3]
+
+        print(f"{'read_compact (.fcs)':<28}{compact_time:>10.3f} s")
+        print(f"{'speedup':<28}{legacy_time / compact_time:>10.1f} x")
+        print(f"{'size of .fcs':<28}{os.path.getsize(compact) / 2**20:>10.1f} MB "
+              f"({os.path.getsize(compact) / os.path.getsize(path):.0%} of the CSV file)")
+
+        mapped = convert(path)
+        open_time, session = timed(MappedSession, mapped)
+        window_time, window = timed(session.between, rows, rows + 1000)
+        mapped_time, mapped_result = timed(new_load, mapped)
+        assert mapped_result[0] == new[0] and mapped_result[2] == new[2] and mapped_result[3] == new[3]
+
+        print(f"{'open mapped (.fcm)':<28}{open_time * 1000:>10.3f} ms")
+        print(f"{'1 s window of .fcm':<28}{window_time * 1000:>10.3f} ms ({len(window)} rows)")
+        print(f"{'read_mapped (.fcm) summary':<28}{mapped_time:>10.3f} s")
@@ -0,0 +1,97 @@
+"""Benchmark of the fan-out of the live sample stream by lib/publisher.py, entirely on localhost.
+Run from the root of the repository:
+
+    python benchmarks/bench_publisher.py [--address 127.0.0.1:0] [--subscribers 4] [--batches 20000]
+                                         [--batch-size 50] [--queue 64] [--rate 0]
+
+A Publisher is started on the address, port 0 taking any free port and unix:<path> a Unix socket. The given
+number of subscribers read every batch on their own threads, checking that the samples arrive whole and in
+order, alongside one subscriber that connects but never reads. Batches are then published at --rate batches
+per second, or as fast as possible with the default of 0, as the acquisition loop would with an unbounded
+sample rate; readers that cannot keep up then have batches dropped. Reported are:
+
+    publish             time spent in Publisher.publish() per batch, which is all acquisition ever waits for
+    received/dropped    batches received by each subscriber and dropped for it by the publisher
+"""
+
+import os, sys
+import argparse
+import threading
+import time as _time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from lib.publisher import Publisher, Subscriber
+
+
+def reader(subscriber, results, index):
+    received, samples, expected, ordered = 0, 0, None, True
+    for force, newtons, time in subscriber:
+        if expected is not None and time[0] < expected:
+            ordered = False
+        expected = time[-1] + 1
+        received += 1; samples += len(time)
+    results[index] = (received, samples, ordered, subscriber.dropped)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--address', default='127.0.0.1:0')
+    parser.add_argument('--subscribers', type=int, default=4)
+    parser.add_argument('--batches', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--queue', type=int, default=64)
+    parser.add_argument('--rate', type=float, default=0)
+    args = parser.parse_args()
+
+    publisher = Publisher(args.address, args.queue)
+    publisher.start()
+
+    subscribers = [Subscriber(publisher.address, timeout=30) for _ in range(args.subscribers)]
+    stalled = Subscriber(publisher.address)
+    while len(publisher) < args.subscribers + 1:
+        _time.sleep(0.01)
+
+    results = [None] * args.subscribers
+    threads = [threading.Thread(target=reader, args=(subscriber, results, i), daemon=True)
+               for i, subscriber in enumerate(subscribers)]
+    for thread in threads:
+        thread.start()
+
+    size = args.batch_size
+    force, newtons = array('d', [512.0] * size), array('d', [2.5] * size)
+    costs = []
+    started = _time.perf_counter()
+    for batch in range(args.batches):
+        time = array('q', range(batch * size, (batch + 1) * size))
+        if args.rate > 0:
+            # Paced as a stream of samples arriving from the serial port
+            _time.sleep(max(started + batch / args.rate - _time.perf_counter(), 0))
+        start = _time.perf_counter()
+        publisher.publish(force, newtons, time)
+        costs.append(_time.perf_counter() - start)
+    elapsed = _time.perf_counter() - started
+
+    # Let the readers drain their queues before the connections are closed, the stalled queue never drains
+    while sorted(len(subscription.queue) for subscription in publisher.subscriptions)[-2::-1] != [0] * args.subscribers:
+        _time.sleep(0.01)
+        if _time.perf_counter() - started > elapsed + 10:
+            break
+    _time.sleep(0.1)
+    stalled_dropped = max(subscription.dropped for subscription in publisher.subscriptions)
+    publisher.close()
+    for thread in threads:
+        thread.join(10)
+
+    costs.sort()
+    print(f"Published {args.batches} batches of {size} samples to {args.subscribers} readers and 1 stalled "
+          f"subscriber on {publisher.address} in {elapsed:.2f} s, {args.batches * size / elapsed:,.0f} samples/s")
+    print(f"{'publish mean':<24}{sum(costs) / len(costs) * 1e6:>10.1f} us")
+    print(f"{'publish p99':<24}{costs[int(len(costs) * 0.99)] * 1e6:>10.1f} us")
+    print(f"{'publish max':<24}{costs[-1] * 1e6:>10.1f} us")
+    for i, (received, samples, ordered, dropped) in enumerate(results):
+        print(f"{'reader ' + str(i):<24}{received:>10} received, {dropped} dropped, "
+              f"{'in order' if ordered else 'OUT OF ORDER'}")
+    print(f"{'stalled':<24}{stalled_dropped:>10} dropped, queue held at {args.queue}")
+    stalled.close()
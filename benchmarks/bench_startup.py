@@ -0,0 +1,106 @@
+"""Startup benchmark of arduino_main.py with the plotting stack loaded on demand against loading it at startup.
+Run from the root of the repository, on a POSIX system:
+
+    python benchmarks/bench_startup.py [runs]
+
+Two startups are compared, each run in a fresh interpreter:
+
+    lazy        arduino_main.py as it is, lib/graph_plotter.py is only imported by plot_graph()
+    eager       lib/graph_plotter.py imported before arduino_main.py runs, as arduino_main.py used to at the top
+                of the module, which loaded NumPy, PyQt5 and matplotlib, parsed window.ui and created the
+                QApplication before the window appeared
+
+For each, two times are reported as the median of all runs:
+
+    import          time for a new interpreter to import arduino_main
+    first sample    time from starting the process to the first sample written to stdout, in headless mode
+                    against lib/emulator.py, the nearest to the first displayed sample without a display
+
+The processes run in a temporary directory with their own setup.ini, session catalog and results folder, so
+the catalog and recordings of the repository are not touched. Qt runs with the offscreen platform.
+"""
+
+import os, sys
+import shutil
+import tempfile
+import subprocess
+import configparser
+import statistics
+import time as _time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lib.emulator import EmulatedBoard
+
+PRELOAD = {
+    'lazy': "",
+    'eager': "import lib.graph_plotter; lib.graph_plotter.application(); ",
+}
+
+
+def environment():
+    pythonpath = os.pathsep.join(filter(None, (ROOT, os.environ.get('PYTHONPATH'))))
+    return dict(os.environ, PYTHONPATH=pythonpath, QT_QPA_PLATFORM='offscreen')
+
+
+def available(preload, folder):
+    """The modules of lib raise ImportError when an optional dependency is not installed."""
+
+    result = subprocess.run([sys.executable, '-c', preload], cwd=folder, env=environment(),
+                            capture_output=True, text=True)
+    return result.returncode == 0
+
+
+def time_import(preload, folder):
+    start = _time.perf_counter()
+    subprocess.run([sys.executable, '-c', preload + "import arduino_main"], cwd=folder, env=environment(),
+                   stdout=subprocess.DEVNULL, check=True)
+    return _time.perf_counter() - start
+
+
+def time_first_sample(preload, folder):
+    code = preload + f"import runpy; runpy.run_path({os.path.join(ROOT, 'arduino_main.py')!r}, run_name='__main__')"
+    start = _time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', code, '-h', 'samples=1', 'stdout'], cwd=folder,
+                               env=environment(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    first = None
+    for line in process.stdout:
+        if first is None and line.count(',') == 2:
+            first = _time.perf_counter() - start
+    process.wait()
+    return first
+
+
+def prepare(folder, port):
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT, 'setup.ini'))
+    config['SETUP']['port'] = port
+    config['SETUP']['mode'] = 'text'
+    with open(os.path.join(folder, 'setup.ini'), 'w') as ini_file:
+        config.write(ini_file)
+    os.makedirs(os.path.join(folder, 'results'), exist_ok=True)
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    board = EmulatedBoard('text', 100)
+    board.start()
+    folder = tempfile.mkdtemp()
+    prepare(folder, board.port)
+
+    print(f"{'startup':<10}{'import ms':>12}{'first sample ms':>18}")
+    try:
+        for name, preload in PRELOAD.items():
+            if not available(preload, folder):
+                print(f"{name:<10}  could not be run, are NumPy, PyQt5 and matplotlib installed?")
+                continue
+            imports = [time_import(preload, folder) for _ in range(runs)]
+            samples = [time_first_sample(preload, folder) for _ in range(runs)]
+            samples = [s for s in samples if s is not None]
+            first = f"{statistics.median(samples) * 1000:>18.0f}" if samples else f"{'no sample':>18}"
+            print(f"{name:<10}{statistics.median(imports) * 1000:>12.0f}{first}")
+    finally:
+        board.close()
+        shutil.rmtree(folder)
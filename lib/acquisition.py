@@ -0,0 +1,154 @@
+"""Background acquisition of the serial data stream from the Arduino.
+
+    Reading the serial port from the tkinter after() loop ties the sample rate to the repaint rate of the
+    window, so acquisition is done here on a dedicated thread instead. On each pass the thread reads every byte
+    waiting in the input buffer of the serial port in one call and hands it to a decoder, which parses it as a
+    batch into force, newtons and time arrays. The arrays are pushed into a RingBuffer, which the tkinter side
+    drains on each tick.
+
+    The decoder depends on the 'mode' under 'SETUP' in setup.ini. In 'text' mode, the default, the lines printed
+    by the sketch are split and parsed by class LineDecoder in lib/line_parser.py. In 'binary' mode the compact
+    frames sent by the sketch are decoded by class FrameDecoder in lib/protocol.py.
+
+        class RingBuffer        parameters | capacity
+            A bounded, preallocated store of (force, newtons, time) samples. The reader thread is the only
+            producer and the tkinter loop the only consumer. If the consumer falls behind by more than capacity
+            samples, the oldest samples are overwritten and counted in self.overruns.
+
+        class SerialReader      parameters | port, buffer, decoder, diagnostics, on_lost
+            A daemon thread draining an open serial.Serial object through decoder, a LineDecoder if not given,
+            until stop() is called or the connection is lost. Every read and parse is reported to diagnostics,
+            a Diagnostics from lib/diagnostics.py, if given. On connection loss the thread calls on_lost, if
+            given, and exits; callers can also check is_alive() to detect it.
+"""
+
+import threading
+import time as _time
+from array import array
+
+try:
+    import serial
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.acquisition requires {e.name}, install it with: pip install pyserial") from e
+
+from lib.line_parser import LineDecoder
+
+
+class RingBuffer():
+    """Bounded, preallocated buffer of samples shared between the reader thread and the tkinter loop."""
+
+    def __init__(self, capacity=16384):
+        self.capacity = capacity
+        self.force = array('d', bytes(8 * capacity))
+        self.newtons = array('d', bytes(8 * capacity))
+        self.time = array('q', bytes(8 * capacity))
+
+        # Running totals of samples written and read, the difference is the number of unread samples
+        self.head = 0
+        self.tail = 0
+        self.overruns = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, force, newtons, time):
+        """Called from the reader thread. Store one sample, overwriting the oldest if the buffer is full."""
+
+        with self.lock:
+            i = self.head % self.capacity
+            self.force[i] = force; self.newtons[i] = newtons; self.time[i] = time
+            self.head += 1
+
+            if self.head - self.tail > self.capacity:
+                self.overruns += self.head - self.tail - self.capacity
+                self.tail = self.head - self.capacity
+
+    def extend(self, force, newtons, time):
+        """Called from the reader thread. Store a batch of samples given as equal length arrays."""
+
+        count = len(time)
+        if count > self.capacity:
+            # Only the newest samples of the batch fit, the rest are overwritten straight away
+            with self.lock:
+                self.overruns += count - self.capacity
+            force, newtons, time = force[-self.capacity:], newtons[-self.capacity:], time[-self.capacity:]
+            count = self.capacity
+
+        with self.lock:
+            i = self.head % self.capacity
+            first = min(count, self.capacity - i)
+            self.force[i:i + first] = force[:first]
+            self.newtons[i:i + first] = newtons[:first]
+            self.time[i:i + first] = time[:first]
+            if first < count:
+                self.force[:count - first] = force[first:]
+                self.newtons[:count - first] = newtons[first:]
+                self.time[:count - first] = time[first:]
+            self.head += count
+
+            if self.head - self.tail > self.capacity:
+                self.overruns += self.head - self.tail - self.capacity
+                self.tail = self.head - self.capacity
+
+    def drain(self):
+        """Called from the tkinter loop. Remove and return all unread samples as (force, newtons, time) arrays."""
+
+        # The samples are copied out before the lock is released, the reader thread could otherwise overwrite
+        # them whilst they are copied once tail has moved past them
+        with self.lock:
+            start, end = self.tail % self.capacity, self.head % self.capacity
+            count = self.head - self.tail
+            self.tail = self.head
+
+            if count == 0:
+                return array('d'), array('d'), array('q')
+            elif start < end:
+                return self.force[start:end], self.newtons[start:end], self.time[start:end]
+            else:
+                # Unread samples wrap around the end of the buffer
+                return (self.force[start:] + self.force[:end], self.newtons[start:] + self.newtons[:end],
+                        self.time[start:] + self.time[:end])
+
+    def clear(self):
+        with self.lock:
+            self.tail = self.head
+
+
+class SerialReader(threading.Thread):
+    """Drain and decode the serial data stream on a background thread."""
+
+    def __init__(self, port, buffer, decoder=None, diagnostics=None, on_lost=None):
+        super(SerialReader, self).__init__(daemon=True)
+        self.port = port
+        self.buffer = buffer
+        self.decoder = decoder if decoder is not None else LineDecoder()
+        self.diagnostics = diagnostics
+        self.on_lost = on_lost
+        self._stop_event = threading.Event()
+
+    def run(self):
+        diagnostics = self.diagnostics
+        while not self._stop_event.is_set():
+            start = _time.perf_counter()
+            try:
+                # Block for the first byte up to the port timeout, then take everything waiting
+                data = self.port.read(self.port.in_waiting or 1)
+            except (AttributeError, TypeError, OSError, serial.SerialException):
+                # Connection lost, the thread exits and is_alive() becomes False
+                if self.on_lost is not None and not self._stop_event.is_set():
+                    self.on_lost()
+                return
+
+            if data:
+                read = _time.perf_counter()
+                force, newtons, time = self.decoder.feed(data)
+                if diagnostics is not None:
+                    diagnostics.on_read(len(data), read - start)
+                    diagnostics.on_parse(time, _time.perf_counter() - read)
+                if len(time) > 0:
+                    self.buffer.extend(force, newtons, time)
+
+    def stop(self):
+        """Stop the reader thread. The thread exits within the read timeout of the serial port."""
+        self._stop_event.set()
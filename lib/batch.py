@@ -0,0 +1,169 @@
+"""Batch analysis of every session recorded in 'results'.
+
+    Every CSV, compact .fcs and mapped .fcm file in the folder is loaded with lib/session.py and summarised: peak, average, refined average
+    above the trigger threshold, duration, sample count and impulse. Files are summarised in parallel in a pool
+    of processes, one file per task, as loading a session is bound by the CPU.
+
+    Summaries are kept in a JSON index, batch_index.json or 'index' under 'BATCH' in setup.ini, keyed by the
+    path of each file along with its size and modification time and the trigger used. Only files that are new or
+    have changed since the last run are loaded again, and files that no longer exist are dropped from the index.
+
+    The summaries are printed as one comparison table, and written to a CSV file if an output is given:
+
+        python -m lib.batch [folder] [output.csv] [trigger]
+        python arduino_main.py -b output=summary.csv
+
+        class SummaryIndex      parameters | path
+            function lookup()       the summary of a file if its size, modification time and trigger match.
+            function store()        add or replace the summary of a file.
+            function prune()        drop the files that are not in the given paths.
+            function save()         write the index to its JSON file.
+
+        function summarise()    parameters | path, trigger
+            Load one session and return its summary as a dict, run in the worker processes.
+
+        function analyse()      parameters | folder, index, trigger, workers
+            Summarise every session file in folder through the index, returning the summaries sorted by file name.
+
+        function print_table(), write_table()
+            Print the summaries as a table, or write them to a CSV file.
+"""
+
+import os, sys
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from lib.session import read_session
+
+COLUMNS = ('file', 'samples', 'duration', 'peak', 'average', 'refined_average', 'impulse')
+
+
+class SummaryIndex():
+    """Summaries of sessions kept on disk, keyed by path, size and modification time."""
+
+    def __init__(self, path='batch_index.json'):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+
+        try:
+            with open(path, 'r') as index_file:
+                self.entries = json.load(index_file)
+        except (OSError, ValueError):
+            # Missing or unreadable, every file is summarised again
+            self.entries = {}
+
+    @staticmethod
+    def key(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def lookup(self, path, trigger):
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+        size, mtime = self.key(path)
+        if entry['size'] != size or entry['mtime'] != mtime or entry['trigger'] != trigger:
+            return None
+        return entry['summary']
+
+    def store(self, path, trigger, summary):
+        size, mtime = self.key(path)
+        self.entries[path] = {'size': size, 'mtime': mtime, 'trigger': trigger, 'summary': summary}
+        self.changed = True
+
+    def prune(self, paths):
+        for path in set(self.entries) - set(paths):
+            del self.entries[path]
+            self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        # Written to a temporary file first so an interrupted save never leaves a truncated index
+        with open(self.path + '.tmp', 'w') as index_file:
+            json.dump(self.entries, index_file)
+        os.replace(self.path + '.tmp', self.path)
+        self.changed = False
+
+
+def summarise(path, trigger=0.5):
+    """Load the session in path and return its summary, or None if the file is not a readable session."""
+
+    try:
+        session = read_session(path)
+    except (OSError, ValueError):
+        return None
+    if len(session) == 0:
+        return None
+
+    return {
+        'file': os.path.basename(path),
+        'samples': len(session),
+        'duration': session.duration(),
+        'peak': session.peak,
+        'average': round(session.average, 2),
+        'refined_average': session.refined_average(trigger),
+        'impulse': round(session.impulse(), 3),
+    }
+
+
+def analyse(folder='results', index=None, trigger=0.5, workers=None):
+    """Summarise every session file in folder, loading only the files not already summarised in index."""
+
+    index = index if index is not None else SummaryIndex()
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.lower().endswith(('.csv', '.fcs', '.fcm')))
+    index.prune(paths)
+
+    summaries, stale = {}, []
+    for path in paths:
+        summary = index.lookup(path, trigger)
+        if summary is None:
+            stale.append(path)
+        else:
+            summaries[path] = summary
+
+    if len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(summarise, stale, [trigger] * len(stale)))
+    else:
+        # Starting a pool costs more than loading a single file
+        results = [summarise(path, trigger) for path in stale]
+
+    for path, summary in zip(stale, results):
+        if summary is None:
+            print(f"{os.path.basename(path)} could not be read as a session, skipped.")
+            continue
+        index.store(path, trigger, summary)
+        summaries[path] = summary
+
+    index.save()
+    print(f"Summarised {len(summaries)} sessions, {len(paths) - len(stale)} from the index.")
+    return [summaries[path] for path in paths if path in summaries]
+
+
+def print_table(summaries):
+    widths = [max([len(column)] + [len(str(summary[column])) for summary in summaries]) for column in COLUMNS]
+    print('  '.join(column.ljust(width) for column, width in zip(COLUMNS, widths)))
+    for summary in summaries:
+        print('  '.join(str(summary[column]).ljust(width) for column, width in zip(COLUMNS, widths)))
+
+
+def write_table(summaries, path):
+    with open(path, 'w', newline='') as table_file:
+        writer = csv.DictWriter(table_file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    print(f"Summary written to {path}")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:] + [None] * 3
+    summaries = analyse(args[0] or 'results', trigger=float(args[2] or 0.5))
+    print_table(summaries)
+    if args[1]:
+        write_table(summaries, args[1])
@@ -0,0 +1,197 @@
+"""A catalog of every recording session, kept in a local SQLite database.
+
+    Every session recorded by arduino_main.py is given its ID by the catalog when it starts, and its file is
+    named from that ID, results/session_<id>.csv, so a file is never reused however often the program restarts or
+    setup.ini is reset. The ID is allocated inside a write transaction, so processes recording at the same time,
+    such as a window and a headless run, never share one. When the session is completed its sample count, peak,
+    average and duration are stored alongside the time it started and the port of the device.
+
+    The catalog is sessions.db by default, or 'path' under 'CATALOG' in setup.ini. Sessions are indexed by start
+    time, by peak and by port, so queries over a long history only visit the matching rows, and the list panel
+    of PlotGraph, lib/graph_plotter.py, is filled from it. Sessions recorded before the catalog existed can be
+    added to it, and sessions are queried from the command line with name=value pairs:
+
+        python -m lib.catalog import [folder]
+        python -m lib.catalog prune
+        python -m lib.catalog peak=4 since=7d port=COM3 limit=20
+
+        class Catalog       parameters | path
+            function allocate()     start a session, returning its ID and the path of its file.
+            function complete()     store the summary of a session from its RunningStats, lib/stats.py.
+            function register()     add an existing session file, summarised with lib/session.py.
+            function query()        the sessions matching a minimum peak, time range and port, newest first,
+                                    as Entry tuples: id, path, port, started, samples, peak, average, duration.
+            function prune()        drop the sessions whose files no longer exist.
+
+        function parse_time()   parameters | value
+            A time given as seconds since the epoch, a date or date and time in ISO format, or a span before now
+            such as 90m, 12h or 7d.
+
+        function describe()     parameters | entry
+            One line naming a session, its start time, port and peak, as listed by PlotGraph.
+"""
+
+import os, sys
+import math
+import sqlite3
+import time as _time
+from collections import namedtuple
+from datetime import datetime
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE,
+    port TEXT,
+    started REAL NOT NULL,
+    samples INTEGER,
+    peak REAL,
+    average REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started);
+CREATE INDEX IF NOT EXISTS sessions_peak ON sessions (peak, started);
+CREATE INDEX IF NOT EXISTS sessions_port ON sessions (port, started);
+"""
+
+Entry = namedtuple('Entry', 'id path port started samples peak average duration')
+
+SPANS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_time(value):
+    """Seconds since the epoch of a timestamp, an ISO date or a span before now such as 7d."""
+
+    value = str(value).strip()
+    if value[-1:] in SPANS and value[:-1].replace('.', '', 1).isdigit():
+        return _time.time() - float(value[:-1]) * SPANS[value[-1]]
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class Catalog():
+    """Sessions recorded on this machine, with their IDs allocated atomically."""
+
+    def __init__(self, path='sessions.db'):
+        self.path = path
+        # Autocommit, transactions are opened explicitly where they are needed
+        self.db = sqlite3.connect(path, timeout=10, isolation_level=None)
+        # Readers, such as the plot window, never block a recording and the other way round
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def allocate(self, folder='results', extension='.csv', port=None, suffix=''):
+        """Start a session, returning its ID and the path of its file, folder/session_<id><suffix><extension>."""
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                session_id = self.db.execute("INSERT INTO sessions (port, started) VALUES (?, ?)",
+                                             (port, _time.time())).lastrowid
+                path = os.path.realpath(os.path.join(folder, f"session_{session_id}{suffix}{extension}"))
+                if not os.path.exists(path):
+                    break
+                # Left by a catalog that has since been deleted, the ID is skipped rather than overwrite it
+                self.db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+            self.db.execute("UPDATE sessions SET path = ? WHERE id = ?", (path, session_id))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return session_id, path
+
+    def complete(self, session_id, stats):
+        """Store the summary of a completed session, or forget it if nothing was recorded."""
+
+        if stats.count == 0:
+            # The writer removes the empty file, so is the entry
+            self.db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            return
+
+        self.db.execute("UPDATE sessions SET samples = ?, peak = ?, average = ?, duration = ? WHERE id = ?",
+                        (stats.count, stats.max, round(stats.mean, 2), stats.duration, session_id))
+
+    def register(self, path, port=None):
+        """Add a session file recorded outside the catalog, returning its ID or None if it is not a session."""
+
+        # Imported on demand, loading a session pulls in NumPy
+        from lib.session import read_session
+
+        path = os.path.realpath(path)
+        row = self.db.execute("SELECT id FROM sessions WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        try:
+            session = read_session(path)
+        except (OSError, ValueError):
+            return None
+        if len(session) == 0:
+            return None
+
+        # The modification time is when recording finished
+        started = os.path.getmtime(path) - session.duration() / 1000
+        return self.db.execute("INSERT INTO sessions (path, port, started, samples, peak, average, duration) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (path, port, started, len(session), float(session.peak),
+                                round(float(session.average), 2), float(session.duration()))).lastrowid
+
+    def query(self, peak=None, since=None, until=None, port=None, limit=None):
+        """Completed sessions with a peak of at least peak N, started between since and until, newest first."""
+
+        clauses, args = ["samples IS NOT NULL"], []
+        if peak is not None:
+            clauses.append("peak >= ?"); args.append(float(peak))
+        if since is not None:
+            clauses.append("started >= ?"); args.append(parse_time(since))
+        if until is not None:
+            clauses.append("started <= ?"); args.append(parse_time(until))
+        if port is not None:
+            clauses.append("port = ?"); args.append(port)
+
+        sql = f"SELECT {', '.join(Entry._fields)} FROM sessions WHERE {' AND '.join(clauses)} ORDER BY started DESC"
+        if limit is not None:
+            sql += " LIMIT ?"; args.append(int(limit))
+        return [Entry(*row) for row in self.db.execute(sql, args)]
+
+    def prune(self):
+        """Drop the sessions whose files no longer exist, returning how many were dropped."""
+
+        missing = [(session_id,) for session_id, path in self.db.execute("SELECT id, path FROM sessions")
+                   if path is None or not os.path.exists(path)]
+        self.db.executemany("DELETE FROM sessions WHERE id = ?", missing)
+        return len(missing)
+
+    def close(self):
+        self.db.close()
+
+
+def describe(entry):
+    """One line of text for an entry, as shown in the list panel of PlotGraph."""
+
+    started = _time.strftime('%Y-%m-%d %H:%M', _time.localtime(entry.started))
+    name = os.path.splitext(os.path.basename(entry.path))[0]
+    peak = None if entry.peak is None or math.isnan(entry.peak) else f"{entry.peak} N"
+    return '  '.join(part for part in (name, started, entry.port, peak) if part)
+
+
+if __name__ == '__main__':
+    catalog = Catalog()
+    if sys.argv[1:2] == ['import']:
+        folder = sys.argv[2] if len(sys.argv) > 2 else 'results'
+        added = [catalog.register(os.path.join(folder, name)) for name in sorted(os.listdir(folder))
+                 if name.lower().endswith(('.csv', '.fcs', '.fcm'))]
+        print(f"{sum(1 for session_id in added if session_id is not None)} sessions in the catalog from {folder}")
+    elif sys.argv[1:2] == ['prune']:
+        print(f"{catalog.prune()} sessions dropped")
+    else:
+        options = dict(arg.split('=', 1) for arg in sys.argv[1:] if '=' in arg)
+        for entry in catalog.query(**options):
+            print(f"{describe(entry)}  {entry.samples} samples  {entry.duration / 1000:.1f} s  "
+                  f"average {entry.average} N")
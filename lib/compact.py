@@ -0,0 +1,236 @@
+"""Compact binary storage of recording sessions, an alternative to CSV.
+
+    A CSV row spends around 20 bytes of text on every sample, although consecutive readings of the sensor are
+    mostly identical or a few counts apart and time moves on by the same step every sample. Compact session
+    files, with the extension .fcs, store each column as fixed point integers, force in tenths and newtons in
+    thousandths by default, take the difference of every value from the one before, and write the differences
+    as zigzag varints, so most samples take a single byte per column. Encoding and decoding are vectorised with
+    NumPy over whole chunks.
+
+        offset  size    header, little-endian
+        0       4       magic b'FCS1'
+        4       8       float64 force scale, force is stored as round(force * scale)
+        12      8       float64 newtons scale
+        20      8       uint64 number of samples, 0 until the session is complete
+        28      8       float64 peak newtons, NaN until the session is complete
+        36      8       float64 average newtons, NaN until the session is complete
+
+    The header is followed by any number of chunks, one per write, each starting from zero so every chunk can
+    be decoded on its own: a uint32 sample count and the uint32 byte lengths of the force, newtons and time
+    columns, followed by the three columns. A file cut short by a crash is read up to its last whole chunk, and
+    its summary is calculated from the data as for a CSV file without a summary row.
+
+    Setting 'format = compact' under 'SETUP' in setup.ini records new sessions in this format. Files can be
+    converted either way, to or from the CSV layout of lib/recorder.py:
+
+        python -m lib.compact to-csv results/session_1.fcs [results/session_1.csv]
+        python -m lib.compact from-csv results/session_1.csv [results/session_1.fcs]
+
+        class CompactWriter     parameters | path, stats, verbose
+            StreamingWriter from lib/recorder.py writing the compact format.
+
+        function iter_chunks()  parameters | path
+            Yield the (force, newtons, time) NumPy arrays of each chunk of a file in turn, to stream it.
+
+        function read_compact() parameters | path
+            Load a whole file as a Session from lib/session.py.
+
+        function to_csv(), from_csv()
+            Convert a file between the two formats.
+"""
+
+import os, sys
+import struct
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.compact requires {e.name}, install it with: pip install numpy") from e
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from lib.recorder import StreamingWriter
+from lib.session import Session, read_csv
+
+MAGIC = b'FCS1'
+HEADER = struct.Struct('<4sddQdd')
+CHUNK = struct.Struct('<IIII')
+FORCE_SCALE = 10.0
+NEWTONS_SCALE = 1000.0
+EXTENSION = '.fcs'
+
+
+def encode_column(values):
+    """Delta, zigzag and varint encode an int64 array into bytes."""
+
+    deltas = np.diff(values, prepend=np.int64(0))
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+
+    # Bytes needed by each value, 7 bits per byte
+    lengths = np.ones(len(zigzag), dtype=np.int64)
+    rest = zigzag >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+
+    offsets = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max()) if len(lengths) else 0):
+        selected = lengths > k
+        byte = (zigzag[selected] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (lengths[selected] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[selected] + k] = byte | more
+    return out.tobytes()
+
+
+def decode_column(data, count):
+    """Decode count values written by encode_column() back into an int64 array."""
+
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if len(raw) == count:
+        # Every value fits in a single byte
+        zigzag = raw.astype(np.uint64)
+    else:
+        zigzag = _join_varints(raw)
+
+    deltas = (zigzag >> np.uint64(1)).astype(np.int64) ^ -(zigzag & np.uint64(1)).astype(np.int64)
+    return np.cumsum(deltas)
+
+
+def _join_varints(raw):
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Position of every byte within its value, each byte holds the next 7 bits
+    position = np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)
+    parts = (raw & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    return np.bitwise_or.reduceat(parts, starts)
+
+
+def encode_chunk(force, newtons, time, force_scale=FORCE_SCALE, newtons_scale=NEWTONS_SCALE):
+    columns = [encode_column(np.rint(np.asarray(force, dtype=np.float64) * force_scale).astype(np.int64)),
+               encode_column(np.rint(np.asarray(newtons, dtype=np.float64) * newtons_scale).astype(np.int64)),
+               encode_column(np.asarray(time, dtype=np.int64))]
+    return CHUNK.pack(len(time), *(len(column) for column in columns)) + b''.join(columns)
+
+
+def read_header(compact_file):
+    magic, force_scale, newtons_scale, count, peak, average = HEADER.unpack(compact_file.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{compact_file.name} is not a compact session file")
+    return force_scale, newtons_scale, count, peak, average
+
+
+def iter_chunks(path):
+    """Yield the (force, newtons, time) arrays of each whole chunk of a compact session file in order."""
+
+    with open(path, 'rb') as compact_file:
+        force_scale, newtons_scale = read_header(compact_file)[:2]
+        while True:
+            head = compact_file.read(CHUNK.size)
+            if len(head) < CHUNK.size:
+                return
+            count, *lengths = CHUNK.unpack(head)
+            body = compact_file.read(sum(lengths))
+            if len(body) < sum(lengths):
+                # Cut short by a crash whilst recording
+                return
+
+            force_end, newtons_end = lengths[0], lengths[0] + lengths[1]
+            yield (decode_column(body[:force_end], count) / force_scale,
+                   decode_column(body[force_end:newtons_end], count) / newtons_scale,
+                   decode_column(body[newtons_end:], count))
+
+
+def read_compact(path):
+    """Load a compact session file as a Session."""
+
+    with open(path, 'rb') as compact_file:
+        peak, average = read_header(compact_file)[3:]
+
+    chunks = list(iter_chunks(path))
+    if chunks:
+        force, newtons, time = (np.concatenate(column) for column in zip(*chunks))
+    else:
+        force, newtons, time = np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64)
+
+    return Session(force, newtons, time.astype(np.float64),
+                   None if np.isnan(peak) else peak, None if np.isnan(average) else average)
+
+
+class CompactWriter(StreamingWriter):
+    """StreamingWriter recording in the compact binary format."""
+
+    force_scale = FORCE_SCALE
+    newtons_scale = NEWTONS_SCALE
+
+    def _open(self):
+        self._file = open(self.path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, self.force_scale, self.newtons_scale, 0, float('nan'), float('nan')))
+
+    def _write_chunk(self, force, newtons, time):
+        self._file.write(encode_chunk(force, newtons, time, self.force_scale, self.newtons_scale))
+
+    def _write_summary(self):
+        # The header is rewritten in place now the summary is known
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, self.force_scale, self.newtons_scale, self.count,
+                                     self.stats.max, round(self.stats.mean, 2)))
+        self._file.seek(0, os.SEEK_END)
+
+
+def to_csv(path, output=None):
+    """Convert a compact session file to the CSV layout of a recording."""
+
+    output = output or os.path.splitext(path)[0] + '.csv'
+    with open(path, 'rb') as compact_file:
+        peak, average = read_header(compact_file)[3:]
+
+    # Streamed chunk by chunk, the summary is calculated on the way if the session was never completed
+    maximum, total, count = float('-inf'), 0.0, 0
+    with open(output, 'w', newline='') as csv_file:
+        csv_file.write(','.join(StreamingWriter.fieldnames) + '\n')
+        for force, newtons, time in iter_chunks(path):
+            csv_file.write(''.join(f"{f},{n},{t},,\n" for f, n, t in zip(force.tolist(), newtons.tolist(),
+                                                                         time.tolist())))
+            if len(newtons) > 0:
+                maximum = max(maximum, float(newtons.max()))
+                total += float(newtons.sum()); count += len(newtons)
+
+        if count > 0:
+            peak = maximum if np.isnan(peak) else peak
+            average = total / count if np.isnan(average) else average
+            csv_file.write(f",,,{peak},{round(average, 2)}\n")
+    return output
+
+
+def from_csv(path, output=None, chunk_size=65536):
+    """Convert a CSV session file to the compact format."""
+
+    output = output or os.path.splitext(path)[0] + EXTENSION
+    session = read_csv(path)
+    with open(output, 'wb') as compact_file:
+        if len(session) == 0:
+            # No samples and no summary, written as CompactWriter leaves a session that never completed
+            compact_file.write(HEADER.pack(MAGIC, FORCE_SCALE, NEWTONS_SCALE, 0, float('nan'), float('nan')))
+            return output
+
+        compact_file.write(HEADER.pack(MAGIC, FORCE_SCALE, NEWTONS_SCALE, len(session), session.peak,
+                                       round(session.average, 2)))
+        for start in range(0, len(session), chunk_size):
+            end = start + chunk_size
+            compact_file.write(encode_chunk(session.force[start:end], session.newtons[start:end],
+                                            session.time[start:end]))
+    return output
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('to-csv', 'from-csv'):
+        print("Usage: python -m lib.compact to-csv|from-csv <file> [output]")
+        sys.exit(1)
+
+    convert = to_csv if sys.argv[1] == 'to-csv' else from_csv
+    print(f"Written {convert(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)}")
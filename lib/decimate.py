@@ -0,0 +1,46 @@
+"""Level-of-detail downsampling of long recordings for plotting.
+
+    Drawing every sample of a recording makes rendering and panning with the navigation toolbar slow for long
+    sessions, although no more than a couple of points per pixel column can ever be seen. The samples in view
+    are therefore split into one bucket per pixel column and only the lowest and highest sample of each bucket
+    are drawn, in time order, so peaks stay visible at every zoom level and the number of points drawn is
+    bounded by the width of the canvas rather than the length of the recording.
+
+        function minmax_decimate()      parameters | x, y, buckets, x_range
+            Return the x and y arrays of the min/max per bucket of the samples within x_range, a (low, high)
+            tuple, or all samples if x_range is None. x must be sorted, as the time of a session is. The
+            samples either side of x_range are included so the line runs to the edges of the axes.
+"""
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.decimate requires {e.name}, install it with: pip install numpy") from e
+
+
+def minmax_decimate(x, y, buckets, x_range=None):
+    """Reduce x, y to the lowest and highest sample of each of buckets equal slices of the samples in view."""
+
+    start, end = 0, len(x)
+    if x_range is not None:
+        start = max(int(np.searchsorted(x, x_range[0], side='left')) - 1, 0)
+        end = min(int(np.searchsorted(x, x_range[1], side='right')) + 1, len(x))
+
+    count = end - start
+    buckets = max(int(buckets), 1)
+    if count <= 2 * buckets:
+        return x[start:end], y[start:end]
+
+    # Pad the samples in view to a whole number of buckets, padding is ignored by nanargmin/nanargmax
+    size = -(-count // buckets)
+    view = np.full(buckets * size, np.nan)
+    view[:count] = y[start:end]
+    view = view.reshape(buckets, size)
+
+    filled = (count + size - 1) // size
+    offsets = np.arange(filled) * size + start
+    low = np.nanargmin(view[:filled], axis=1) + offsets
+    high = np.nanargmax(view[:filled], axis=1) + offsets
+
+    index = np.unique(np.concatenate(([start], low, high, [end - 1])))
+    return x[index], y[index]
@@ -0,0 +1,222 @@
+"""Concurrent acquisition from several Arduinos at once.
+
+    Every device has its own serial port, SerialReader thread, ring buffer, statistics and CSV recording, so
+    devices never wait on each other and the aggregate sample rate grows with the number of devices. A single
+    consumer drains all ring buffers in one pass, which only copies the samples already parsed by the readers.
+
+    The millis() of each Arduino starts when the board is reset, so samples are aligned to a common time base:
+    when the first batch of a device is drained its offset is taken as the host time in ms less the millis() of
+    the last sample of that batch, the sample received closest to the moment the host time is read, and every
+    sample of that device is placed at millis() + offset. The offset is taken again after a reconnection, as the
+    board may have been reset. The merged view orders the samples of all devices by aligned time.
+
+        class Device        parameters | port, bps, mode, initial, maximum, dsp
+            One Arduino: the open serial port, its reader thread, ring buffer, RunningStats and StreamingWriter,
+            and dsp, its own Pipeline of filters from lib/dsp.py or None.
+            Every device has its own Supervisor from lib/supervisor.py, which makes the first connection and
+            reconnects the device whenever its connection is lost, with the same exponential backoff from initial
+            to maximum seconds, 'RECONNECT' in setup.ini, and the same search by USB fingerprint as a single board.
+
+        class DeviceGroup   parameters | ports, bps, mode, initial, maximum, pipeline
+            pipeline, if given, is called with the name of every device to build its Pipeline, as from_config() in
+            lib/dsp.py, so the filters of one device never see the samples of another.
+            function start_recording()  record every device to results/session_<id>_<port>.csv, with an ID
+                                        from the session catalog, class Catalog in lib/catalog.py, per device.
+            function stop_recording()   complete the CSV file of every device.
+            function poll()             drain every device, filter the newtons of each through its Pipeline,
+                                        record the samples and return the batches. Given a limit, only the
+                                        earliest limit samples of all devices by aligned time are filtered,
+                                        recorded and returned, the rest are dropped.
+            function merge()            order the batches returned by poll() by aligned time into one set of
+                                        columns, with the index of the device of each sample.
+"""
+
+import os, sys
+import heapq
+import itertools
+import time as _time
+from array import array
+
+try:
+    import serial
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.devices requires {e.name}, install it with: pip install pyserial") from e
+
+from lib.acquisition import RingBuffer, SerialReader
+from lib.diagnostics import Diagnostics
+from lib.line_parser import LineDecoder
+from lib.protocol import FrameDecoder
+from lib.recorder import StreamingWriter
+from lib.stats import RunningStats
+from lib.supervisor import Fingerprint, Supervisor
+
+
+class Device():
+    """One Arduino read on its own thread into its own ring buffer."""
+
+    def __init__(self, port, bps, mode='text', initial=0.1, maximum=5.0, dsp=None):
+        self.port = port
+        self.bps = bps
+        self.mode = mode
+        self.dsp = dsp
+        self.name = os.path.basename(port)
+
+        self.buffer = RingBuffer()
+        self.stats = RunningStats()
+        self.diagnostics = Diagnostics()
+        self.writer = None
+        self.session_id = None
+        self.reader = None
+        self.arduino = None
+
+        self.offset = None
+        self.init_time = None
+        self.connection_lost = False
+        self.fingerprint = Fingerprint.of(port)
+        # The first connection is made by the supervisor as soon as it starts
+        self.supervisor = Supervisor(self, initial, maximum, self.diagnostics)
+        self.supervisor.start()
+
+    @property
+    def connected(self):
+        return self.reader is not None and self.reader.is_alive()
+
+    def connect(self, port=None):
+        """Called by self.supervisor. Open port, self.port if not given, returning True once connected."""
+
+        port = self.port if port is None else port
+        self.release()
+        try:
+            self.arduino = serial.Serial(port, self.bps, timeout=.1)
+        except serial.SerialException:
+            if not self.connection_lost:
+                # Only reported once, the supervisor keeps retrying in the background
+                print(f"Arduino not found on {port}:{self.bps}, reconnecting...", file=sys.stderr)
+            self.connection_lost = True
+            return False
+
+        print(f"Arduino found on {port}:{self.bps}", file=sys.stderr)
+        self.port, self.connection_lost = port, False
+        self.fingerprint = Fingerprint.of(port) or self.fingerprint
+        decoder = FrameDecoder() if self.mode == 'binary' else LineDecoder()
+        self.diagnostics.decoder = decoder; self.diagnostics.buffer = self.buffer
+        # A reconnected board may have been reset, its clock is aligned again from its first sample
+        self.offset = None
+        self.reader = SerialReader(self.arduino, self.buffer, decoder, self.diagnostics, on_lost=self.lost)
+        self.reader.start()
+        return True
+
+    def lost(self):
+        """Called from the reader thread when the connection to the Arduino is lost."""
+
+        print(f"Connection to Arduino was lost on {self.port}:{self.bps}!", file=sys.stderr)
+        self.connection_lost = True
+        self.supervisor.lost()
+
+    def release(self):
+        """Stop the reader thread and close the serial port, if open."""
+
+        if self.reader is not None:
+            self.reader.stop()
+            self.reader.join()
+            self.reader = None
+        if self.arduino is not None:
+            try:
+                self.arduino.close()
+            except (OSError, serial.SerialException):
+                pass
+            self.arduino = None
+
+    def close(self):
+        self.supervisor.stop()
+        self.supervisor.join()
+        self.release()
+
+
+class DeviceGroup():
+    """Acquire from several Arduinos at once, each on its own reader thread."""
+
+    def __init__(self, ports, bps, mode='text', initial=0.1, maximum=5.0, pipeline=None):
+        self.devices = [Device(port, bps, mode, initial, maximum,
+                               pipeline(os.path.basename(port)) if pipeline is not None else None)
+                        for port in ports]
+        self.catalog = None
+        self.recording = False
+
+    def start_recording(self, catalog, folder='results', verbose=False):
+        self.catalog = catalog
+        for device in self.devices:
+            device.stats.reset()
+            device.init_time = None
+            device.session_id, path = catalog.allocate(folder, '.csv', device.port, suffix=f"_{device.name}")
+            device.writer = StreamingWriter(path, device.stats, verbose=verbose)
+            print(f"Recording {device.port} into {os.path.basename(device.writer.path)}", file=sys.stderr)
+        self.recording = True
+
+    def stop_recording(self):
+        """Complete the CSV file of every device, waiting for the files to be written."""
+
+        self.recording = False
+        for device in self.devices:
+            if device.writer is not None:
+                self.catalog.complete(device.session_id, device.stats)
+                device.writer.close()
+        for device in self.devices:
+            if device.writer is not None:
+                device.writer.join()
+                device.writer = None
+
+    def poll(self, limit=None):
+        """Drain every device and record its samples, at most limit samples across all devices if given.\n
+        Returns a list with the (force, newtons, aligned time) arrays of each device, in device order."""
+
+        host_ms = int(_time.time() * 1000)
+        drained = []
+        for device in self.devices:
+            force, newtons, times = device.buffer.drain()
+            if len(times) > 0 and device.offset is None:
+                device.offset = host_ms - times[-1]
+            drained.append((force, newtons, times))
+
+        if limit is not None and sum(len(times) for force, newtons, times in drained) > limit:
+            # The earliest samples by aligned time are kept, which is a leading slice of every device
+            streams = [zip([t + device.offset for t in times], [i] * len(times))
+                       for i, (device, (force, newtons, times)) in enumerate(zip(self.devices, drained))]
+            keep = [0] * len(drained)
+            for t, i in itertools.islice(heapq.merge(*streams), max(limit, 0)):
+                keep[i] += 1
+            drained = [(force[:n], newtons[:n], times[:n]) for n, (force, newtons, times) in zip(keep, drained)]
+
+        batches = []
+        for device, (force, newtons, times) in zip(self.devices, drained):
+            if len(times) > 0:
+                if device.dsp is not None:
+                    newtons = device.dsp.process(newtons, times)
+                if self.recording:
+                    if device.init_time is None:
+                        device.init_time = times[0]
+                    relative = [t - device.init_time for t in times]
+                    device.stats.update(newtons, relative)
+                    device.writer.extend(force, newtons, relative)
+                times = array('q', [t + device.offset for t in times])
+            batches.append((force, newtons, times))
+
+        return batches
+
+    def merge(self, batches):
+        """Order the batches of poll() by aligned time into (device, force, newtons, time) columns."""
+
+        streams = [zip(times, [i] * len(times), force, newtons) for i, (force, newtons, times) in enumerate(batches)]
+        device, force, newtons, time = array('b'), array('d'), array('d'), array('q')
+        for t, i, f, n in heapq.merge(*streams):
+            device.append(i); force.append(f); newtons.append(n); time.append(t)
+
+        return device, force, newtons, time
+
+    @property
+    def count(self):
+        return sum(device.stats.count for device in self.devices)
+
+    def close(self):
+        for device in self.devices:
+            device.close()
@@ -0,0 +1,137 @@
+"""Counters and timers of the acquisition hot path.
+
+    class Diagnostics collects what happens to the serial data stream between the serial port and the window:
+    bytes read, samples parsed, lines or frames rejected by the decoder, samples overwritten in the ring buffer,
+    gaps and resets in the millis() sequence of the Arduino, the scheduling lag of each after() tick of main(),
+    the time spent reading, parsing and updating the window, and the time taken to reacquire the Arduino after
+    the connection was lost (lib/supervisor.py). Everything is updated once per read or tick, never per sample
+    other than the gap check, so the counters are cheap enough to leave on all the time.
+
+    The counters are exposed as a stats line printed to the console every 'interval' seconds under
+    'DIAGNOSTICS' in setup.ini, as the Diagnostics panel under Options, and as a JSON dump from dump().
+
+        class Timer
+            Total, count and maximum of a repeated measurement in seconds.
+
+        class Diagnostics       parameters | tick
+            function on_read()      called by SerialReader with the bytes read and the time the read took.
+            function on_parse()     called by SerialReader with the times parsed and the time parsing took.
+            function on_tick()      called by main() with the lag of the tick and the time the tick took.
+            function snapshot()     a dict of all counters, including the decoder and ring buffer counters.
+            function line()         a one line summary with rates since the previous line.
+            function dump()         write snapshot() to a JSON file.
+"""
+
+import json
+import time as _time
+
+
+class Timer():
+    """Total, count and maximum of a repeated measurement in seconds."""
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self):
+        return {'total_s': self.total, 'count': self.count, 'max_ms': self.max * 1000,
+                'mean_ms': self.total / self.count * 1000 if self.count else 0.0}
+
+
+class Diagnostics():
+    """Counters and timers of the acquisition hot path, updated per read and per tick."""
+
+    def __init__(self, tick=0.005):
+        self.tick = tick
+        self.started = _time.perf_counter()
+
+        self.bytes_read = 0
+        self.samples = 0
+        self.gaps = 0
+        self.resets = 0
+
+        self.read = Timer()
+        self.parse = Timer()
+        self.ui = Timer()
+        self.lag = Timer()
+        self.reacquire = Timer()
+
+        # Sources of the decoder and ring buffer counters, set by Connect.connect()
+        self.decoder = None
+        self.buffer = None
+
+        self._interval = None
+        self._last_time = None
+        self._previous = None
+
+    def on_read(self, count, seconds):
+        self.bytes_read += count
+        self.read.add(seconds)
+
+    def on_parse(self, time, seconds):
+        self.parse.add(seconds)
+        self.samples += len(time)
+
+        # A gap is a step in millis() of more than 1.5 times the average step, a reset a step backwards
+        last, interval = self._last_time, self._interval
+        for t in time:
+            if last is not None:
+                step = t - last
+                if step < 0:
+                    self.resets += 1
+                elif interval is None:
+                    interval = step
+                else:
+                    if step > 1.5 * interval + 1:
+                        self.gaps += 1
+                    interval += (step - interval) / 16
+            last = t
+        self._last_time, self._interval = last, interval
+
+    def on_tick(self, lag, seconds):
+        self.lag.add(max(lag, 0.0))
+        self.ui.add(seconds)
+
+    def snapshot(self):
+        decoder = self.decoder
+        return {
+            'uptime_s': _time.perf_counter() - self.started,
+            'bytes_read': self.bytes_read,
+            'samples': self.samples,
+            'rejected': getattr(decoder, 'rejected', 0),
+            'resync_bytes': getattr(decoder, 'skipped', 0),
+            'overruns': self.buffer.overruns if self.buffer is not None else 0,
+            'millis_gaps': self.gaps,
+            'millis_resets': self.resets,
+            'read': self.read.as_dict(),
+            'parse': self.parse.as_dict(),
+            'ui': self.ui.as_dict(),
+            'tick_lag': self.lag.as_dict(),
+            'reacquire': self.reacquire.as_dict(),
+        }
+
+    def line(self):
+        """One line summary of the counters, with rates since the previous call."""
+
+        now = self.snapshot()
+        before = self._previous or {'uptime_s': 0.0, 'bytes_read': 0, 'samples': 0}
+        elapsed = max(now['uptime_s'] - before['uptime_s'], 1e-9)
+        self._previous = now
+
+        return (f"[stats] {(now['samples'] - before['samples']) / elapsed:.0f} samples/s, "
+                f"{(now['bytes_read'] - before['bytes_read']) / elapsed:.0f} B/s | "
+                f"rejected {now['rejected']}, overruns {now['overruns']}, "
+                f"gaps {now['millis_gaps']}, resets {now['millis_resets']} | "
+                f"parse {now['parse']['mean_ms']:.2f} ms, ui {now['ui']['mean_ms']:.2f} ms, "
+                f"lag {now['tick_lag']['mean_ms']:.1f}/{now['tick_lag']['max_ms']:.1f} ms")
+
+    def dump(self, path):
+        with open(path, 'w') as dump_file:
+            json.dump(self.snapshot(), dump_file, indent=4)
@@ -0,0 +1,209 @@
+"""Streaming filters and pulse detection over the newtons of the serial data stream, with NumPy.
+
+    class Pipeline sits between the ring buffer and handle_samples() in arduino_main.py: every batch of samples
+    drained by main() or headless() is filtered before it is displayed and recorded, and passed through the pulse
+    detector. It is only imported when 'filters' or 'event_threshold' is set under 'DSP' in setup.ini.
+
+    Every filter keeps just enough state between batches to continue exactly where the previous batch ended, and
+    works on a whole batch at a time with NumPy, so the cost per sample does not depend on the size of the batch.
+    Filters are given in 'filters' as a comma separated chain, applied in order:
+
+        ma:<n>                  moving average over the last n samples.
+        ema:<alpha>             exponential moving average, y = alpha * x + (1 - alpha) * y.
+        median:<n>              running median over the last n samples, to remove spikes.
+        lowpass:<hz>[:<order>]  first order IIR low-pass with a cutoff of hz, cascaded order times. The
+                                coefficient of every sample is taken from its time step, so the cutoff holds
+                                whatever the sample rate of the stream.
+
+        class PulseDetector     parameters | threshold, on_event
+            Finds pulses, the spans of samples at or above threshold, as the samples arrive. When a pulse ends,
+            on_event is called with an Event: its start, end, peak and time of the peak, its rise time from the
+            threshold crossing to the peak and its width, the time spent at or above threshold, all in ms.
+
+        class Pipeline          parameters | filters, detector
+            function process()      filter one batch of newtons, returned as an array('d').
+
+        function from_config()  parameters | section, on_event
+            Build a Pipeline from the 'DSP' section of setup.ini, None if nothing is configured.
+"""
+
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.dsp requires {e.name}, install it with: pip install numpy") from e
+
+# Length of the blocks the first order recursion is solved in and the largest coefficient, together keeping the
+# running products of (1 - a) within the range of a float
+BLOCK = 32
+A_MAX = 1 - 1e-9
+
+Event = namedtuple('Event', 'start end peak peak_time rise_time width')
+
+
+def first_order(x, a, y):
+    """Solve y[k] = a[k] * x[k] + (1 - a[k]) * y[k - 1] for a whole batch, with y the last output before it."""
+
+    out = np.empty_like(x)
+    for start in range(0, len(x), BLOCK):
+        xs, as_ = x[start:start + BLOCK], np.minimum(a[start:start + BLOCK], A_MAX)
+        decay = np.cumprod(1 - as_)
+        out[start:start + BLOCK] = decay * (y + np.cumsum(as_ * xs / decay))
+        y = out[start + len(xs) - 1]
+    return out
+
+
+class MovingAverage():
+    def __init__(self, n):
+        self.n = n
+        self.tail = None
+
+    def __call__(self, x, time):
+        if self.tail is None:
+            self.tail = np.full(self.n - 1, x[0])
+        padded = np.concatenate((self.tail, x))
+        total = np.cumsum(np.concatenate(([0.0], padded)))
+        self.tail = padded[len(padded) - (self.n - 1):]
+        return (total[self.n:] - total[:-self.n]) / self.n
+
+
+class Median():
+    def __init__(self, n):
+        self.n = n
+        self.tail = None
+
+    def __call__(self, x, time):
+        if self.tail is None:
+            self.tail = np.full(self.n - 1, x[0])
+        padded = np.concatenate((self.tail, x))
+        self.tail = padded[len(padded) - (self.n - 1):]
+        return np.median(np.lib.stride_tricks.sliding_window_view(padded, self.n), axis=1)
+
+
+class EMA():
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.y = None
+
+    def __call__(self, x, time):
+        if self.y is None:
+            self.y = x[0]
+        out = first_order(x, np.full(len(x), self.alpha), self.y)
+        self.y = out[-1]
+        return out
+
+
+class LowPass():
+    def __init__(self, cutoff, order=1):
+        self.rc = 1000 / (2 * np.pi * cutoff)
+        self.order = order
+        self.y = None
+        self.last_time = None
+
+    def __call__(self, x, time):
+        if self.y is None:
+            self.y = [x[0]] * self.order
+            self.last_time = time[0]
+        dt = np.diff(time, prepend=self.last_time).astype(float)
+        a = dt / (self.rc + dt)
+        self.last_time = time[-1]
+
+        for stage in range(self.order):
+            x = first_order(x, a, self.y[stage])
+            self.y[stage] = x[-1]
+        return x
+
+
+FILTERS = {'ma': MovingAverage, 'ema': EMA, 'median': Median, 'lowpass': LowPass}
+
+
+class PulseDetector():
+    """Detect pulses above a threshold across batches, reporting each as an Event when it ends."""
+
+    def __init__(self, threshold=0.5, on_event=None):
+        self.threshold = threshold
+        self.on_event = on_event
+        self.count = 0
+
+        self.above = False
+        self.start = None
+        self.peak = None
+        self.peak_time = None
+        self.last_time = None
+
+    def __call__(self, y, time):
+        above = y >= self.threshold
+        # Indices where the samples change between below and above the threshold, including the first sample
+        # if it differs from the end of the previous batch
+        edges = np.flatnonzero(above[1:] != above[:-1]) + 1
+        if len(above) > 0 and above[0] != self.above:
+            edges = np.concatenate(([0], edges))
+        bounds = np.concatenate((edges, [len(y)]))
+
+        segment = 0
+        for edge in bounds:
+            if self.above and edge > segment:
+                i = segment + int(np.argmax(y[segment:edge]))
+                if self.peak is None or y[i] > self.peak:
+                    self.peak, self.peak_time = float(y[i]), int(time[i])
+            if edge == len(y):
+                break
+
+            if not above[edge]:
+                self._end(int(time[edge - 1]) if edge > 0 else self.last_time)
+            else:
+                self.above, self.start, self.peak = True, int(time[edge]), None
+            segment = edge
+        if len(time) > 0:
+            self.last_time = int(time[-1])
+
+    def _end(self, end):
+        self.above = False
+        event = Event(self.start, end, self.peak, self.peak_time, self.peak_time - self.start, end - self.start)
+        self.count += 1
+        if self.on_event is not None:
+            self.on_event(event)
+
+
+class Pipeline():
+    """A chain of streaming filters followed by an optional pulse detector."""
+
+    def __init__(self, filters=(), detector=None):
+        self.filters = list(filters)
+        self.detector = detector
+
+    def process(self, newtons, time):
+        """Filter one batch of newtons and pass it through the detector, returning the filtered newtons."""
+
+        if len(time) == 0:
+            return newtons
+
+        y = np.frombuffer(newtons, dtype=np.float64)
+        t = np.frombuffer(time, dtype=np.int64)
+        for stage in self.filters:
+            y = stage(y, t)
+        if self.detector is not None:
+            self.detector(y, t)
+
+        return array('d', np.ascontiguousarray(y, dtype=np.float64).tobytes())
+
+
+def from_config(section, on_event=None):
+    """Build a Pipeline from the 'DSP' section of setup.ini, or return None if it configures nothing."""
+
+    filters = []
+    for spec in filter(None, (item.strip() for item in section.get('filters', '').split(','))):
+        name, *args = spec.split(':')
+        if name not in FILTERS:
+            raise ValueError(f"Unknown filter '{name}' under 'DSP' in setup.ini, expected one of {', '.join(FILTERS)}")
+        cast = [float(arg) if '.' in arg else int(arg) for arg in args]
+        filters.append(FILTERS[name](*cast))
+
+    threshold = section.get('event_threshold', '')
+    detector = PulseDetector(float(threshold), on_event) if threshold != '' else None
+
+    if not filters and detector is None:
+        return None
+    return Pipeline(filters, detector)
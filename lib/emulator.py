@@ -0,0 +1,162 @@
+"""A pseudo-terminal stand-in for the Arduino running arduino/source code/force_meter.ino.
+
+    The emulator opens a pseudo-terminal (pty) and writes samples to it in either the text or the binary mode
+    of the sketch, so the host side can be exercised through a real serial.Serial object without a board.
+    The pty is only available on POSIX systems.
+
+    Samples are either synthesised, a slow press and release of the sensor with optional Gaussian noise on the
+    analogue reading, or replayed from a session recorded in 'results', cycling through the force and time of
+    the recording. A fraction of the samples can be corrupted, by overwriting a random byte, to exercise the
+    rejection of malformed lines and the resynchronisation on binary frames. Like a real serial port, the pty
+    does not hold back the board: if the host does not read fast enough to keep up, bytes that no longer fit in
+    the buffer of the pty are lost and counted in self.overflowed.
+
+    Running this module prints the name of the serial port to open, which can be set as 'port' under 'SETUP'
+    in setup.ini:
+
+        python -m lib.emulator [text|binary] [rate] [noise] [corruption] [replay file]
+
+        class EmulatedBoard     parameters | mode, rate, noise, corruption, replay, sequence, seed
+            Opens the pty on creation, the name of its serial port is self.port. Samples are written at rate
+            samples per second on a background thread between start() and stop(). noise is the standard
+            deviation of the noise added to the analogue reading and corruption the fraction of samples
+            corrupted. If sequence is True the time field carries the index of each sample instead of
+            millis() and the time each sample was written is kept in self.sent_at, which is used by
+            benchmarks/bench_pipeline.py to find dropped and duplicated samples and their latency.
+"""
+
+import os, sys
+import math
+import random
+import threading
+import time as _time
+
+from lib.protocol import encode_frame
+
+# Calibration constants of the sketch
+A_READING = 22.0
+A_LOAD = 0.98
+B_READING = 57.0
+B_LOAD = 4.9
+
+
+def load_from_raw(raw):
+    """Calculate the load in newtons from the analogue reading, as the sketch does."""
+    return ((B_LOAD - A_LOAD) / (B_READING - A_READING)) * (raw - A_READING) + A_LOAD
+
+
+def encode_line(raw, load, time):
+    """Encode one sample as the line printed by the sketch in text mode."""
+    return f"Reading: {raw:.1f} {load:.2f}  {time}\n".encode()
+
+
+class EmulatedBoard():
+    """Write samples in the format of force_meter.ino to a pseudo-terminal."""
+
+    def __init__(self, mode='text', rate=100, noise=0.0, corruption=0.0, replay=None, sequence=False, seed=None):
+        import pty, tty
+
+        self.mode = mode
+        self.rate = rate
+        self.noise = noise
+        self.corruption = corruption
+        self.sequence = sequence
+        self.random = random.Random(seed)
+
+        self.replay = None
+        if replay is not None:
+            from lib.session import read_csv
+
+            session = read_csv(replay)
+            self.replay = (session.force.tolist(), session.time.tolist())
+
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+        self.sent = 0
+        self.sent_at = []
+        self.corrupted = 0
+        self.overflowed = 0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def sample(self, n):
+        """The analogue reading and millis() of sample n."""
+
+        if self.replay is not None:
+            force, time = self.replay
+            cycle, i = divmod(n, len(time))
+            # Each replay of the recording continues in time from the end of the previous one
+            return force[i], int(time[i] + cycle * (time[-1] + 1))
+
+        millis = int(n * 1000 / self.rate)
+        raw = 40 + 18 * math.sin(millis / 1000)
+        if self.noise:
+            raw += self.random.gauss(0, self.noise)
+        return float(round(min(max(raw, 0), 1023))), millis
+
+    def encode(self, n):
+        raw, millis = self.sample(n)
+        time = n if self.sequence else millis
+        if self.mode == 'binary':
+            data = encode_frame(int(raw), load_from_raw(raw), time)
+        else:
+            data = encode_line(raw, load_from_raw(raw), time)
+
+        if self.corruption and self.random.random() < self.corruption:
+            data = bytearray(data)
+            data[self.random.randrange(len(data))] = self.random.randrange(256)
+            self.corrupted += 1
+        return bytes(data)
+
+    def write(self, data):
+        """Write to the pty without blocking, bytes that do not fit are lost as on a real serial port."""
+
+        try:
+            written = os.write(self.master, data)
+        except BlockingIOError:
+            written = 0
+        self.overflowed += len(data) - written
+
+    def run(self):
+        start = _time.perf_counter()
+        while not self._stop_event.is_set():
+            due = int((_time.perf_counter() - start) * self.rate)
+            if due > self.sent:
+                chunk = b''.join(self.encode(n) for n in range(self.sent, due))
+                if self.sequence:
+                    now = _time.perf_counter()
+                    self.sent_at.extend([now] * (due - self.sent))
+                self.write(chunk)
+                self.sent = due
+            _time.sleep(min(0.001, 1 / self.rate))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:] + [None] * 5
+    board = EmulatedBoard(args[0] or 'text', int(args[1] or 100), float(args[2] or 0), float(args[3] or 0), args[4])
+    print(f"Emulating Arduino on {board.port}, press Ctrl+C to stop...")
+    board.start()
+    try:
+        while True:
+            _time.sleep(1)
+    except KeyboardInterrupt:
+        board.close()
@@ -1,8 +1,20 @@
 """A graph plotting module using Matplotlib to generate graphs from 
 collected data stored in CSV files and PyQt5 to create the window framework.\n
-NOTE: Module is in beta stage and will require redevelopment for improved efficiency at a later date."""
+NOTE: Module is in beta stage and will require redevelopment for improved efficiency at a later date.
+
+    This module is only imported by plot_graph() in arduino_main.py the first time 'Plot Graph' is opened, so
+    NumPy, PyQt5 and matplotlib are never loaded by sessions that do not plot. window.ui is compiled to Python
+    once, into window_ui.py next to it, and only compiled again when window.ui is newer than the compiled file;
+    the QApplication is created by application() when the first window is opened.
+
+    The list panel on the right is filled from the session catalog, class Catalog in lib/catalog.py, newest
+    session first, and selecting a session plots it in place of the current graph. The window keeps one figure,
+    canvas and toolbar for its whole life: changing session only swaps the data of its lines, and sessions are
+    loaded through a SessionCache from lib/session.py, so a session shown before is not read from disk again
+    unless its file has changed. With 'Overlay' checked in the menu bar every session selected in the list, with
+    Ctrl or Shift, is drawn on the same axes, the time of each measured from its trigger point, the first sample
+    at or above the trigger threshold of 0.5 N."""
 
-import csv
 import os, sys
 
 try:
@@ -12,120 +24,230 @@ try:
     from matplotlib.backends.backend_qt5agg import (FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar)
     from matplotlib.figure import Figure
 except ModuleNotFoundError as e:
-    print("The following module could not be found:", e)
-    quit()
+    raise ImportError(f"lib.graph_plotter requires {e.name}, install it with: pip install numpy PyQt5 matplotlib") from e
 
 path = os.path.dirname(os.path.realpath(__file__))
-Ui_MainWindow, QMainWindow = uic.loadUiType(f'{path}\\window.ui')
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(path))
+
+from lib.session import SessionCache
+from lib.decimate import minmax_decimate
+from lib.catalog import Catalog, describe
+
+
+
+def load_ui():
+    """Return the Ui_MainWindow class compiled from window.ui, compiling it only when window.ui has changed."""
+
+    source = os.path.join(path, 'window.ui')
+    compiled = os.path.join(path, 'window_ui.py')
+    if not os.path.exists(compiled) or os.path.getmtime(compiled) < os.path.getmtime(source):
+        try:
+            with open(compiled, 'w') as ui_file:
+                uic.compileUi(source, ui_file)
+        except OSError:
+            # 'lib' is read-only, parse window.ui on every load instead
+            return uic.loadUiType(source)[0]
+
+    from lib.window_ui import Ui_MainWindow
+    return Ui_MainWindow
 
-app = QtWidgets.QApplication(sys.argv)
 
+# Held for the life of the process, Qt aborts on the first widget if the QApplication has been garbage collected
+_app = None
 
-class PlotGraph(QMainWindow, Ui_MainWindow):
-    def __init__(self, parent=None, *args, **kwargs):
+
+def application():
+    """Return the QApplication, created on first use."""
+
+    global _app
+    _app = _app or QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    return _app
+
+
+Ui_MainWindow = load_ui()
+
+
+# Sessions parsed by any window, shared so reopening 'Plot Graph' or flipping back to a session does not read it again
+cache = SessionCache(capacity=8)
+
+
+class PlotGraph(QtWidgets.QMainWindow, Ui_MainWindow):
+    def __init__(self, parent=None, catalog=None, *args, **kwargs):
+        application()
         super(PlotGraph, self).__init__(parent)
         self.setupUi(self)
         self.mplfigs.itemClicked.connect(self.change_graph)
+        self.actionOverlay.toggled.connect(lambda checked: self.change_graph())
         self.figure_dict = {}
+        self.folder = '../results' if __name__ == '__main__' else './results'
 
-        # Lists for data records
-        self.time = []
-        self.newtons = []
+        # Arrays for data records, loaded by plot()
+        self.session = None
+        self.time = None
+        self.newtons = None
         self.trigger = 0.5
 
-        if __name__ == '__main__':
-            # Loop over all result records generated
-            file_in_dir = [name for name in os.listdir('../results')]
-            for i in range(0, len(file_in_dir)):
-                name = file_in_dir[i][:-4]
+        # One figure, canvas and toolbar for the life of the window, plot() and overlay() swap the data of the lines
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot(111)
+        self.line, = self.ax.plot([], [])
+        self.peak_marker, = self.ax.plot([], [], '.')
+        self.average_line, = self.ax.plot([], [], '--')
+        self.refined_line, = self.ax.plot([], [], '--')
+        # (line, session, offset) of every session drawn, offset being subtracted from its time
+        self.traces = []
+        self.overlay_lines = []
+
+        self.canvas = FigureCanvas(self.figure)
+        self.mplvl.addWidget(self.canvas)
+        self.toolbar = NavigationToolbar(self.canvas, self, coordinates=True)
+        self.addToolBar(self.toolbar)
+        self.ax.callbacks.connect('xlim_changed', self.update_detail)
+        self.canvas.mpl_connect('resize_event', lambda event: self.update_detail(self.ax))
+
+        if catalog is not None:
+            self.list_sessions(catalog)
+
 
-                self.figure_dict[name] = file_in_dir[i]
-                self.mplfigs.addItem(name)
+    def list_sessions(self, catalog, **query):
+        """Fill the records dictionary (right-panel) from the session catalog, newest first. Keyword arguments
+        are passed on to Catalog.query(), such as peak=4 and since='7d'."""
+
+        for entry in catalog.query(**query):
+            name = describe(entry)
+            self.figure_dict[name] = entry.path
+            self.mplfigs.addItem(name)
+
+
+    def load(self, datafile):
+        """Local function called internally. Return the path of datafile and its session, through the cache."""
+
+        # Paths from the catalog are absolute and used as they are, file names are looked for in 'results'
+        datapath = os.path.realpath(os.path.join(self.folder, datafile))
+        if datapath not in self.figure_dict.values():
+            name = os.path.splitext(os.path.basename(datafile))[0]
+            self.figure_dict[name] = datapath
+            self.mplfigs.addItem(name)
+        return datapath, cache.load(datapath)
 
 
     def plot(self, datafile):
         """Local function called internally. Plot the selected graph chosen from the records dictionary (right-panel)."""
 
-        self.time.clear(); self.newtons.clear()
-        with open(f"../results/{datafile}" if __name__ == '__main__' else f"./results/{datafile}", newline='') as data_file:
-            reader = csv.DictReader(data_file)
-            for row in reader:
-                if not row['average'] == '':
-                    self.average = float(row['average'])
-                
-                if not row['peak'] == '':
-                    self.peak = float(row['peak'])
-
-                if not row['time'] == '' or not row['newtons'] == '':
-                    self.time.append(row['time'])
-                    self.newtons.append(row['newtons'])
-
-
-        self.time = [float(x) for x in self.time]; self.newtons = [float(x) for x in self.newtons]
-        self.bounds = [n for n in self.newtons if n > self.trigger * 0.9]
-        
-        self.refined_average = 0
-        for j in self.bounds:
-            self.refined_average += j
-        
-        self.refined_average = round(self.refined_average / len(self.bounds), 2)
-
-        self.figure = Figure()
-        self.ax = self.figure.add_subplot(111)
-        self.ax.set_xlabel("Time (ms)"); self.ax.set_ylabel("Newtons (N)"); self.ax.set_title(datafile)
-        
-        self.ax.plot(self.time, self.newtons)
-        self.ax.plot(self.time[self.newtons.index(self.peak)], self.peak, '.', label="Peak | " + str(self.peak))
-        self.ax.plot([min(self.time), max(self.time)], [self.average]*2, '--', label="Average | " + str(round(self.average, 2)))
-        self.ax.plot([min(self.time), max(self.time)], [self.refined_average]*2, '--', label="Average ±10% | " + str(self.refined_average))
+        datapath, self.session = self.load(datafile)
+        self.time = self.session.time; self.newtons = self.session.newtons
+        self.average = self.session.average; self.peak = self.session.peak
+        self.refined_average = self.session.refined_average(self.trigger)
+
+        self.clear_overlay()
+        self.ax.set_xlabel("Time (ms)"); self.ax.set_ylabel("Newtons (N)"); self.ax.set_title(os.path.basename(datafile))
+
+        # Time is in order, the first and last samples avoid a pass over a mapped session
+        t_min, t_max = self.time[0], self.time[-1]
+        self.line.set_label('_line')
+        self.peak_marker.set_data([self.time[self.session.peak_index()]], [self.peak])
+        self.peak_marker.set_label("Peak | " + str(self.peak))
+        self.average_line.set_data([t_min, t_max], [self.average]*2)
+        self.average_line.set_label("Average | " + str(round(self.average, 2)))
+        self.refined_line.set_data([t_min, t_max], [self.refined_average]*2)
+        self.refined_line.set_label("Average ±10% | " + str(self.refined_average))
+        for summary in (self.peak_marker, self.average_line, self.refined_line):
+            summary.set_visible(True)
+
+        self.traces = [(self.line, self.session, 0)]
+        self.show_traces(t_min, t_max)
+
+
+    def overlay(self, datafiles):
+        """Local function called internally. Plot several sessions on shared axes, the time of each measured from
+        its trigger point, the first sample at or above self.trigger."""
+
+        self.clear_overlay()
+        self.ax.set_xlabel("Time from trigger (ms)"); self.ax.set_ylabel("Newtons (N)")
+        self.ax.set_title(f"{len(datafiles)} sessions aligned at {self.trigger} N")
+        for summary in (self.peak_marker, self.average_line, self.refined_line):
+            summary.set_visible(False)
+            summary.set_label('_summary')
+
+        self.traces = []
+        self.line.set_data([], [])
+        t_min, t_max = float('inf'), float('-inf')
+        for datafile in datafiles:
+            datapath, session = self.load(datafile)
+            if len(session) == 0:
+                continue
+            if not self.traces:
+                line = self.line
+            else:
+                line, = self.ax.plot([], [])
+                self.overlay_lines.append(line)
+
+            offset = session.time[session.trigger_index(self.trigger)]
+            line.set_label(f"{os.path.splitext(os.path.basename(datapath))[0]} | peak {session.peak}")
+            self.traces.append((line, session, offset))
+            t_min, t_max = min(t_min, session.time[0] - offset), max(t_max, session.time[-1] - offset)
+
+        if self.traces:
+            self.show_traces(t_min, t_max)
+
+
+    def clear_overlay(self):
+        """Local function called internally. Remove the lines added by overlay(), keeping the persistent ones."""
+
+        for line in self.overlay_lines:
+            line.remove()
+        self.overlay_lines = []
+
+
+    def show_traces(self, t_min, t_max):
+        """Local function called internally. Draw every trace over t_min to t_max and rescale the y-axis."""
+
+        for line, session, offset in self.traces:
+            line.set_data(*self.decimate(session, offset, (t_min, t_max)))
+        self.ax.relim(visible_only=True); self.ax.autoscale_view(scalex=False)
 
         handles, labels = self.ax.get_legend_handles_labels()
         self.ax.legend(handles, labels)
 
-        if not __name__ == '__main__':
-            self.mplfigs.addItem(datafile[:-4])
-
-            self.add_graph(self.figure)
+        # Redraws the traces at the resolution of the canvas through update_detail()
+        self.ax.set_xlim(t_min, t_max)
+        self.canvas.draw_idle()
 
 
-    def add_graph(self, figure):
-        """Local function called internally. Draw new canvas and create new navigation toolbar."""
-
-        self.canvas = FigureCanvas(figure)
-        self.mplvl.addWidget(self.canvas)
-        self.canvas.draw()
+    def decimate(self, session, offset, x_range):
+        """Local function called internally. The min/max of each pixel column of a session within x_range,
+        a range of its time less offset, so aligned sessions are sliced without copying their time arrays."""
 
-        # Toolbar
-        self.toolbar = NavigationToolbar(self.canvas, self, coordinates=True)
-        self.addToolBar(self.toolbar)
+        x, y = minmax_decimate(session.time, session.newtons, self.ax.bbox.width,
+                               (x_range[0] + offset, x_range[1] + offset))
+        return x - offset, y
 
 
-    def change_graph(self, item):
-        """Local function called internally. Load the chosen graph from the records dictionary.\n
-        Function will call rm_mpl() and then plot() passing the selected record."""
+    def update_detail(self, ax):
+        """Local callback called when the x-limits change through the navigation toolbar.
+        Redraw the lines from the full arrays at the resolution of the canvas for the new limits."""
 
-        text = item.text()
-        try:
-            self.rm_mpl()
-        except:
-            pass
-       
-        if __name__ == '__main__':
-            self.plot(self.figure_dict[text])
-            self.add_graph(self.figure)
+        for line, session, offset in self.traces:
+            line.set_data(*self.decimate(session, offset, ax.get_xlim()))
+        ax.figure.canvas.draw_idle()
 
 
-    def rm_mpl(self):
-        """Local function called internally. Remove the canvas and navigation toolbar to be recreated."""
+    def change_graph(self, item=None):
+        """Local function called internally. Load the chosen graph from the records dictionary.\n
+        With 'Overlay' checked every selected record is drawn by overlay(), otherwise the chosen one by plot()."""
 
-        self.mplvl.removeWidget(self.canvas)
-        self.canvas.close()
-        self.mplvl.removeWidget(self.toolbar)
-        self.toolbar.close()
+        selected = [selected.text() for selected in self.mplfigs.selectedItems()]
+        if self.actionOverlay.isChecked() and selected:
+            self.overlay([self.figure_dict[text] for text in selected])
+        elif item is not None:
+            self.plot(self.figure_dict[item.text()])
+        elif selected:
+            self.plot(self.figure_dict[selected[-1]])
 
 
 if __name__ == '__main__':
-    main = PlotGraph()
+    main = PlotGraph(catalog=Catalog(os.path.join(os.path.dirname(path), 'sessions.db')))
     main.show()
 
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(application().exec())
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""Fast parser for the lines sent by arduino/source code/force_meter.ino.
+
+    The sketch prints one line per sample in the exact format
+
+        Reading: <raw> <load>  <millis>\n
+
+    where <raw> is the analogue reading printed to 1 decimal place, <load> the calculated newtons printed to
+    2 decimal places and <millis> the internal elapsed time of the Arduino in milliseconds. A line may end in
+    '\r\n' if the stream passes through a terminal.
+
+    Lines are matched on the raw bytes with a single compiled regular expression, so nothing is decoded to str
+    and float() and int() are applied to the matched bytes only once. Malformed or partial lines, including
+    the 'ovf', 'nan' and 'inf' the Arduino prints for floats out of range, simply do not match and are skipped.
+
+        function parse_line()       parameters | line
+            Parse one line into a (force, newtons, time) tuple, or None if the line is not a valid reading.
+
+        function parse_chunk()      parameters | data
+            Parse a block of complete lines into columnar force, newtons and time arrays in one pass.
+
+        class LineDecoder
+            Decoder for the text mode of the sketch used by class SerialReader. Splits the bytes read from the
+            serial port into complete lines, keeping a partial trailing line for the next read, and parses them
+            with parse_chunk(). Complete lines that are not valid readings are counted in self.rejected.
+"""
+
+import re
+from array import array
+
+_NUMBERS = rb'Reading: (-?\d+(?:\.\d+)?) (-?\d+(?:\.\d+)?) +(\d+)\r?'
+
+LINE = re.compile(_NUMBERS + rb'\n?')
+LINES = re.compile(rb'^' + _NUMBERS + rb'$', re.MULTILINE)
+
+
+def parse_line(line):
+    """Parse a single line of bytes sent by the Arduino into a (force, newtons, time) tuple.\n
+    Returns None if the line is not a complete reading."""
+
+    match = LINE.fullmatch(line)
+    if match is None:
+        return None
+
+    force, newtons, time = match.groups()
+    return float(force), float(newtons), int(time)
+
+
+def parse_chunk(data):
+    """Parse a block of complete lines of bytes into columnar (force, newtons, time) arrays.\n
+    Lines that are not complete readings are skipped."""
+
+    matches = LINES.findall(data)
+    if not matches:
+        return array('d'), array('d'), array('q')
+
+    force, newtons, time = zip(*matches)
+    return array('d', map(float, force)), array('d', map(float, newtons)), array('q', map(int, time))
+
+
+class LineDecoder():
+    """Split the bytes read from the serial port into complete lines and parse them in batches."""
+
+    # Longest partial line kept between reads, anything longer is not a line sent by the Arduino
+    max_partial = 4096
+
+    def __init__(self):
+        self.partial = b''
+        self.rejected = 0
+
+    def feed(self, data):
+        """Parse all complete lines in data, prefixed by the partial line of the previous call.\n
+        Returns columnar (force, newtons, time) arrays."""
+
+        data = self.partial + data
+        end = data.rfind(b'\n') + 1
+        self.partial = data[end:] if len(data) - end <= self.max_partial else b''
+
+        force, newtons, time = parse_chunk(data[:end])
+        self.rejected += data.count(b'\n', 0, end) - len(time)
+        return force, newtons, time
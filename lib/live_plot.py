@@ -0,0 +1,150 @@
+"""A live scrolling plot of newtons against time fed from the incoming serial data stream.
+
+    The window subscribes to the samples drained by main() in arduino_main.py. Receiving samples only copies
+    them into a preallocated circular buffer; the plot itself is redrawn on its own tkinter after() schedule
+    at a fixed frame rate. Redrawing uses matplotlib blitting over axes that stay fixed, time running from
+    -window seconds to 0 at the latest sample, so only the line is drawn each frame. The serial data stream is
+    read on its own thread (lib/acquisition.py), so a slow redraw never delays serial reads; if a frame takes
+    longer than the frame interval, the next frame is delayed to keep the window responsive.
+
+    The window reports the frame rate achieved and the render cost of the last frame beneath the plot.
+
+        class LivePlot      parameters | master, subscribers, window, fps
+            A tkinter Toplevel window. The window appends its callback to subscribers on creation and removes
+            it when closed. window is the time span shown in seconds and fps the target frame rate; both are
+            read from 'window' and 'fps' under 'LIVE' in setup.ini by arduino_main.py.
+"""
+
+import time as _time
+import tkinter as tk
+
+try:
+    import numpy as np
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.live_plot requires {e.name}, install it with: pip install numpy matplotlib") from e
+
+from lib.decimate import minmax_decimate
+
+
+class LivePlot(tk.Toplevel):
+    """Live scrolling plot of the serial data stream, redrawn at a fixed frame rate."""
+
+    def __init__(self, master, subscribers, window=10.0, fps=30, capacity=65536):
+        super(LivePlot, self).__init__(master)
+
+        self.subscribers = subscribers
+        self.window = window
+        self.interval = max(int(1000 / fps), 1)
+        self.capacity = capacity
+
+        # Preallocated circular buffer of the latest samples
+        self.time = np.zeros(capacity)
+        self.newtons = np.zeros(capacity)
+        self.head = 0
+        self.dirty = False
+
+        self.frames = 0
+        self.fps = 0.0
+        self.frame_cost = 0.0
+        self.fps_start = _time.perf_counter()
+
+        tk.Toplevel.wm_title(self, "Live Plot")
+
+        self.figure = Figure(figsize=(6, 3))
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel("Time (s)"); self.ax.set_ylabel("Newtons (N)")
+        self.ax.set_xlim(-window, 0); self.ax.set_ylim(-0.5, 5)
+        self.line, = self.ax.plot([], [], animated=True)
+        self.figure.tight_layout()
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self)
+        self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.background = None
+
+        self.status = tk.StringVar()
+        tk.Label(self, textvariable=self.status).pack(side="bottom")
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.subscribers.append(self.push)
+        self.canvas.draw()
+        self._job = self.after(self.interval, self.render)
+
+    def push(self, force, newtons, time):
+        """Subscriber callback. Copy a batch of samples into the circular buffer."""
+
+        count = len(time)
+        if count == 0:
+            return
+        if count > self.capacity:
+            newtons, time = newtons[-self.capacity:], time[-self.capacity:]
+            self.head += count - self.capacity
+            count = self.capacity
+
+        i = self.head % self.capacity
+        first = min(count, self.capacity - i)
+        self.time[i:i + first] = time[:first]; self.newtons[i:i + first] = newtons[:first]
+        if first < count:
+            self.time[:count - first] = time[first:]; self.newtons[:count - first] = newtons[first:]
+        self.head += count
+        self.dirty = True
+
+    def visible(self):
+        """Return the time in seconds relative to the latest sample and the newtons within the window."""
+
+        if self.head <= self.capacity:
+            time, newtons = self.time[:self.head], self.newtons[:self.head]
+        else:
+            i = self.head % self.capacity
+            time = np.concatenate((self.time[i:], self.time[:i]))
+            newtons = np.concatenate((self.newtons[i:], self.newtons[:i]))
+
+        time = (time - time[-1]) / 1000
+        start = int(np.searchsorted(time, -self.window, side='left'))
+        return time[start:], newtons[start:]
+
+    def on_draw(self, event):
+        """Local callback called after a full redraw. Store the empty axes to blit the line onto."""
+
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def render(self):
+        """Local function called on the after() schedule. Redraw the line if new samples have arrived."""
+
+        start = _time.perf_counter()
+        if self.dirty and self.head > 0:
+            self.dirty = False
+            time, newtons = self.visible()
+            self.line.set_data(*minmax_decimate(time, newtons, self.ax.bbox.width))
+
+            low, high = self.ax.get_ylim()
+            if newtons.min() < low or newtons.max() > high:
+                # Grow the y-axis and redraw everything, on_draw() stores the new background
+                self.ax.set_ylim(min(low, newtons.min() - 0.5), max(high, newtons.max() + 0.5))
+                self.canvas.draw()
+            elif self.background is not None:
+                self.canvas.restore_region(self.background)
+                self.ax.draw_artist(self.line)
+                self.canvas.blit(self.ax.bbox)
+
+            self.frames += 1
+            self.frame_cost = _time.perf_counter() - start
+
+        elapsed = _time.perf_counter() - self.fps_start
+        if elapsed >= 1.0:
+            self.fps = self.frames / elapsed
+            self.frames = 0; self.fps_start = _time.perf_counter()
+            self.status.set(f"FPS: {self.fps:.1f}    Frame: {self.frame_cost * 1000:.1f} ms")
+
+        # A frame slower than the interval delays the next one rather than queueing frames
+        self._job = self.after(max(self.interval, int(self.frame_cost * 2000)), self.render)
+
+    def close(self):
+        if self.push in self.subscribers:
+            self.subscribers.remove(self.push)
+        self.after_cancel(self._job)
+        self.destroy()
@@ -0,0 +1,203 @@
+"""Fixed-width session files opened with numpy.memmap, for recordings of any length.
+
+    A mapped session file, with the extension .fcm, is a 64 byte header followed by one fixed-width 24 byte row
+    per sample, so the file can be mapped into memory as a NumPy structured array without reading it. Opening a
+    session is therefore O(1) in the size of the file: pages are only read from disk when the data in them is
+    used. The time column is in order, so the rows of a time range are found by a binary search over the mapped
+    column, which touches a few pages, and slicing them out touches only the pages of those rows.
+
+        offset  size    header, little-endian, padded to 64 bytes
+        0       4       magic b'FCM2'
+        4       8       uint64 number of samples, 0 until the session is complete
+        12      8       float64 peak newtons, NaN until the session is complete
+        20      8       float64 average newtons, NaN until the session is complete
+        28      8       int64 index of the first row holding the peak, -1 until the session is complete
+        36      8       float64 trigger threshold of the refined average, NaN until the session is complete
+        44      8       float64 refined average newtons, NaN until the session is complete
+
+    The summary in the header is all PlotGraph needs besides the rows it draws, so a completed session is opened
+    without a pass over its rows. Files written before the index and refined average were added, magic b'FCM1',
+    are still read, those two being calculated from the rows the first time they are used.
+
+        offset  size    row
+        0       8       int64 time in ms
+        8       8       float64 force
+        16      8       float64 newtons
+
+    Rows are appended as they are recorded, so a session can be recorded straight into this format with
+    'format = mapped' under 'SETUP' in setup.ini. A file cut short by a crash is mapped up to its last whole row.
+    CSV and compact .fcs sessions can be converted, the compact format a chunk at a time:
+
+        python -m lib.mapped results/session_1.csv [results/session_1.fcm]
+
+        class MappedSession     parameters | path
+            The rows of a file mapped read-only, self.time, self.force and self.newtons being views of them.
+            function between()      the rows from start to end ms as a Session, without copying them.
+            function session()      the whole file as a Session, without copying it.
+
+        class MappedWriter      parameters | path, stats, verbose
+            StreamingWriter from lib/recorder.py appending rows to a mapped session file.
+
+        function convert()      parameters | path, output
+            Convert a CSV or compact session file to a mapped session file.
+"""
+
+import os, sys
+import struct
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.mapped requires {e.name}, install it with: pip install numpy") from e
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from lib.recorder import StreamingWriter
+from lib.session import Session
+
+MAGIC = b'FCM2'
+HEADER = struct.Struct('<4sQddqdd')
+# The header of files written before the peak index and refined average were stored
+HEADER_V1 = struct.Struct('<4sQdd')
+HEADER_SIZE = 64
+ROW = np.dtype([('time', '<i8'), ('force', '<f8'), ('newtons', '<f8')])
+EXTENSION = '.fcm'
+
+
+def pack_header(count=0, peak=float('nan'), average=float('nan'), peak_index=-1, trigger=float('nan'),
+                refined_average=float('nan')):
+    return HEADER.pack(MAGIC, count, peak, average, peak_index, trigger, refined_average).ljust(HEADER_SIZE, b'\0')
+
+
+class MappedSession():
+    """A mapped session file, read from disk only where it is used."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as mapped_file:
+            header = mapped_file.read(HEADER.size)
+        if header[:4] == MAGIC:
+            magic, count, self.peak, self.average, self.peak_index, self.trigger, self.refined_average = \
+                HEADER.unpack(header)
+        elif header[:4] == b'FCM1':
+            magic, count, self.peak, self.average = HEADER_V1.unpack(header[:HEADER_V1.size])
+            self.peak_index, self.trigger, self.refined_average = -1, float('nan'), float('nan')
+        else:
+            raise ValueError(f"{path} is not a mapped session file")
+
+        # Without a count the session was never completed, every whole row is used
+        if count == 0:
+            count = (os.path.getsize(path) - HEADER_SIZE) // ROW.itemsize
+        self.rows = (np.memmap(path, dtype=ROW, mode='r', offset=HEADER_SIZE, shape=(count,)) if count > 0
+                     else np.zeros(0, dtype=ROW))
+        self.time, self.force, self.newtons = self.rows['time'], self.rows['force'], self.rows['newtons']
+
+    def __len__(self):
+        return len(self.rows)
+
+    def between(self, start, end):
+        """The rows with start <= time <= end as a Session of views into the file."""
+
+        first = int(np.searchsorted(self.time, start, side='left'))
+        last = int(np.searchsorted(self.time, end, side='right'))
+        rows = self.rows[first:last]
+        return Session(rows['force'], rows['newtons'], rows['time'])
+
+    def session(self):
+        """The whole file as a Session of views into the file, with the summary of the header if complete."""
+
+        refined = None if np.isnan(self.refined_average) else (self.trigger, self.refined_average)
+        return Session(self.force, self.newtons, self.time, None if np.isnan(self.peak) else self.peak,
+                       None if np.isnan(self.average) else self.average,
+                       None if self.peak_index < 0 else self.peak_index, refined)
+
+
+def read_mapped(path):
+    return MappedSession(path).session()
+
+
+class MappedWriter(StreamingWriter):
+    """StreamingWriter appending fixed-width rows to a mapped session file."""
+
+    def _open(self):
+        self._file = open(self.path, 'wb')
+        self._file.write(pack_header())
+        self._written = 0
+        self._peak_index, self._peak = -1, float('-inf')
+
+    def _write_chunk(self, force, newtons, time):
+        rows = np.empty(len(time), dtype=ROW)
+        rows['time'], rows['force'], rows['newtons'] = time, force, newtons
+        self._file.write(rows.tobytes())
+
+        # The first row holding the peak, found a chunk at a time while the rows are still in memory
+        if len(rows) > 0:
+            highest = int(np.argmax(rows['newtons']))
+            if rows['newtons'][highest] > self._peak:
+                self._peak_index, self._peak = self._written + highest, float(rows['newtons'][highest])
+        self._written += len(rows)
+
+    def _write_summary(self):
+        # The header is rewritten in place now the summary is known
+        refined = self.stats.refined_average
+        self._file.seek(0)
+        self._file.write(pack_header(self.count, self.stats.max, round(self.stats.mean, 2), self._peak_index,
+                                     self.stats.trigger, 0.0 if np.isnan(refined) else round(refined, 2)))
+        self._file.seek(0, os.SEEK_END)
+
+
+def convert(path, output=None):
+    """Convert a CSV or compact .fcs session file to a mapped session file."""
+
+    output = output or os.path.splitext(path)[0] + EXTENSION
+    if path.lower().endswith('.fcs'):
+        from lib.compact import iter_chunks, read_header
+
+        with open(path, 'rb') as compact_file:
+            peak, average = read_header(compact_file)[3:]
+        chunks = iter_chunks(path)
+    else:
+        from lib.session import read_csv
+
+        session = read_csv(path)
+        peak, average = session.peak, session.average
+        chunks = [(session.force, session.newtons, session.time)]
+
+    # The refined average is stored for the default trigger threshold of PlotGraph
+    trigger = 0.5
+    count, maximum, peak_index, total, bounds_sum, bounds_count = 0, float('-inf'), -1, 0.0, 0.0, 0
+    with open(output, 'wb') as mapped_file:
+        mapped_file.write(pack_header())
+        for force, newtons, time in chunks:
+            rows = np.empty(len(time), dtype=ROW)
+            rows['time'], rows['force'], rows['newtons'] = time, force, newtons
+            mapped_file.write(rows.tobytes())
+            if len(time) > 0:
+                highest = int(np.argmax(rows['newtons']))
+                if rows['newtons'][highest] > maximum:
+                    maximum, peak_index = float(rows['newtons'][highest]), count + highest
+                above = rows['newtons'] > trigger * 0.9
+                bounds_sum += float(np.sum(rows['newtons'], where=above))
+                bounds_count += int(np.count_nonzero(above))
+                total += float(rows['newtons'].sum())
+                count += len(time)
+
+        if count > 0:
+            peak = maximum if np.isnan(peak) else peak
+            average = total / count if np.isnan(average) else average
+            refined = round(bounds_sum / bounds_count, 2) if bounds_count > 0 else 0.0
+            header = pack_header(count, peak, round(average, 2), peak_index, trigger, refined)
+        else:
+            header = pack_header()
+        mapped_file.seek(0)
+        mapped_file.write(header)
+    return output
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python -m lib.mapped <session file> [output]")
+        sys.exit(1)
+
+    print(f"Written {convert(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)}")
@@ -0,0 +1,116 @@
+"""Compact binary framing of samples sent by arduino/source code/force_meter.ino in binary mode.
+
+    In text mode the sketch prints around 30 bytes per sample, which caps the stream at roughly 30 samples
+    per second at 9600 baud. With BINARY_MODE set to 1 in the sketch, and 'mode = binary' under 'SETUP' in
+    setup.ini, every sample is instead sent as one fixed-size 12 byte frame, little-endian as on the AVR:
+
+        offset  size    field
+        0       1       sync byte 0xA5
+        1       2       uint16 raw analogue reading
+        3       4       float load in newtons
+        7       4       uint32 millis()
+        11      1       checksum, the sum of bytes 1 to 10 modulo 256
+
+    The baudrate of the sketch, BAUD, must match 'bps' under 'SETUP' in setup.ini; binary mode is intended to
+    be used with a higher baudrate such as 115200.
+
+        class FrameDecoder
+            Decoder for the binary mode of the sketch used by class SerialReader. Runs of whole frames are
+            unpacked in bulk with struct.iter_unpack(). When a frame fails its sync byte or checksum, the
+            frame is counted in self.dropped and the decoder resynchronises on the next sync byte that starts
+            a valid frame. Bytes skipped whilst resynchronising are counted in self.skipped.
+
+        function encode_frame()     parameters | raw, load, time
+            Encode a single sample as a frame, as the sketch does. Used by lib/emulator.py.
+"""
+
+import struct
+from array import array
+
+SYNC = 0xA5
+FRAME = struct.Struct('<BHfIB')
+FRAME_SIZE = FRAME.size
+
+# The same frame split into the fields needed to validate it and the fields holding the sample
+_CHECK = struct.Struct('<B10sB')
+_VALUES = struct.Struct('<xHfIx')
+
+
+def checksum(payload):
+    return sum(payload) & 0xFF
+
+
+def encode_frame(raw, load, time):
+    """Encode one sample as a binary frame."""
+
+    payload = FRAME.pack(SYNC, raw, load, time, 0)[1:-1]
+    return bytes([SYNC]) + payload + bytes([checksum(payload)])
+
+
+class FrameDecoder():
+    """Decode binary frames read from the serial port in bulk, resynchronising after corruption."""
+
+    def __init__(self):
+        self.partial = b''
+        self.synced = False
+        self.frames = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    @property
+    def rejected(self):
+        return self.dropped
+
+    def _valid_run(self, data, start, count):
+        """Return how many frames from start, up to count, are valid before the first invalid frame."""
+
+        for i, (sync, payload, check) in enumerate(_CHECK.iter_unpack(data[start:start + count * FRAME_SIZE])):
+            if sync != SYNC or check != checksum(payload):
+                return i
+        return count
+
+    def feed(self, data):
+        """Decode all whole frames in data, prefixed by the partial frame of the previous call.\n
+        Returns columnar (force, newtons, time) arrays."""
+
+        data = self.partial + data
+        force, newtons, time = array('d'), array('d'), array('q')
+
+        pos = 0
+        while len(data) - pos >= FRAME_SIZE:
+            if not self.synced:
+                found = data.find(SYNC, pos)
+                if found == -1 or len(data) - found < FRAME_SIZE:
+                    # Keep a possible sync byte at the end for the next call
+                    found = len(data) if found == -1 else found
+                    self.skipped += found - pos
+                    pos = found
+                    break
+
+                self.skipped += found - pos
+                pos = found
+                if self._valid_run(data, pos, 1) == 0:
+                    # Not the start of a frame, a sync byte inside the data of another frame
+                    self.skipped += 1
+                    pos += 1
+                    continue
+                self.synced = True
+
+            count = (len(data) - pos) // FRAME_SIZE
+            valid = self._valid_run(data, pos, count)
+            if valid > 0:
+                end = pos + valid * FRAME_SIZE
+                for raw, load, millis in _VALUES.iter_unpack(data[pos:end]):
+                    force.append(raw); newtons.append(load); time.append(millis)
+                self.frames += valid
+                pos = end
+
+            if valid < count:
+                # Corrupted frame, drop it and resynchronise from the byte after its sync byte
+                self.dropped += 1
+                self.synced = False
+                self.skipped += 1
+                pos += 1
+
+        self.partial = data[pos:]
+        return force, newtons, time
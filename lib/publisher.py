@@ -0,0 +1,261 @@
+"""Fan-out of the live sample stream to other processes over a local socket.
+
+    Only one process can hold the serial port of the Arduino, so class Publisher passes the samples on: it is
+    appended to conn.subscribers in arduino_main.py when 'address' is set under 'PUBLISH' in setup.ini, and
+    every batch of samples handed to the subscribers is sent to every process connected to the address, which
+    is either host:port for TCP, 127.0.0.1 by default so only the local machine can connect, or unix:<path>
+    for a Unix socket. Any number of loggers, dashboards or analysis scripts can connect and disconnect at any
+    time whilst acquisition runs.
+
+    A batch is encoded once, whatever the number of subscribers, and queued for each subscriber, which has its
+    own sending thread. The queues are bounded, 'queue' batches under 'PUBLISH' in setup.ini: when a subscriber
+    reads too slowly for its queue, the oldest batch is dropped to make room, so a slow or stalled subscriber
+    never holds back acquisition or the other subscribers. Every batch is sent as one frame, little-endian:
+
+        offset  size    header
+        0       2       magic b'FB'
+        2       2       uint16 batches dropped for this subscriber since the previous frame, at most 65535
+        4       4       uint32 number of samples n
+
+        offset  size    columns
+        8       8n      float64 force
+        8 + 8n  8n      float64 newtons
+        8 + 16n 8n      int64 time in ms, as sent by the Arduino
+
+    Running this module subscribes to an address and prints every sample as force,newtons,time, as the
+    'stdout' option of headless():
+
+        python -m lib.publisher [address]
+
+        class Publisher         parameters | address, queue_size
+            Listens on address on a daemon thread from start() until close(). self.address is the address
+            listened on, with the port filled in when port 0 is given.
+            function publish()      queue one batch of force, newtons and time for every subscriber.
+
+        class Subscriber        parameters | address, timeout
+            A connection to a Publisher. Iterating over it yields the (force, newtons, time) arrays of every
+            batch received, self.dropped counting the batches the publisher dropped for it.
+"""
+
+import os, sys
+import socket
+import struct
+import threading
+from array import array
+from collections import deque
+
+HEADER = struct.Struct('<2sHI')
+MAGIC = b'FB'
+
+
+def split_address(address):
+    """The socket family and address of 'host:port', ':port' or 'unix:<path>'."""
+
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+def _column(values, typecode):
+    column = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    if sys.byteorder == 'big':
+        column = array(typecode, column); column.byteswap()
+    return column.tobytes()
+
+
+def encode_batch(force, newtons, time):
+    """The columns of a batch, sent after the header of each frame."""
+
+    return _column(force, 'd') + _column(newtons, 'd') + _column(time, 'q')
+
+
+class Subscription(threading.Thread):
+    """One connected subscriber, sent the batches of its bounded queue on its own thread."""
+
+    def __init__(self, sock, queue_size, on_close):
+        super(Subscription, self).__init__(daemon=True)
+        self.sock = sock
+        self.on_close = on_close
+        self.queue = deque(maxlen=queue_size)
+        self.ready = threading.Condition()
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+
+    def put(self, count, payload):
+        """Called from the publishing thread. Never blocks on the socket, the oldest batch is dropped if full."""
+
+        with self.ready:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append((count, payload))
+            self.ready.notify()
+
+    def run(self):
+        reported = 0
+        try:
+            while True:
+                with self.ready:
+                    while not self.queue and not self.closed:
+                        self.ready.wait()
+                    if self.closed:
+                        return
+                    count, payload = self.queue.popleft()
+                    dropped, reported = self.dropped - reported, self.dropped
+
+                self.sock.sendall(HEADER.pack(MAGIC, min(dropped, 0xFFFF), count) + payload)
+                self.sent += 1
+        except OSError:
+            # The subscriber has disconnected
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+        try:
+            # Wakes the sending thread if it is blocked on a subscriber that has stopped reading
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.on_close(self)
+
+
+class Publisher(threading.Thread):
+    """Send every batch of samples to any number of subscribers on a local socket."""
+
+    def __init__(self, address='127.0.0.1:8765', queue_size=64):
+        super(Publisher, self).__init__(daemon=True)
+        self.queue_size = queue_size
+        self.subscriptions = []
+        self.lock = threading.Lock()
+        self._closed = False
+
+        family, bind = split_address(address)
+        if family == socket.AF_UNIX and os.path.exists(bind):
+            # Left behind by a publisher that was not closed
+            os.unlink(bind)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(bind)
+        self.listener.listen()
+
+        if family == socket.AF_UNIX:
+            self.address = address
+        else:
+            host, port = self.listener.getsockname()[:2]
+            self.address = f"{host}:{port}"
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    def run(self):
+        while not self._closed:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                # The listener was closed by close()
+                return
+            if sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            subscription = Subscription(sock, self.queue_size, self._remove)
+            with self.lock:
+                self.subscriptions = self.subscriptions + [subscription]
+            subscription.start()
+
+    def _remove(self, subscription):
+        with self.lock:
+            self.subscriptions = [other for other in self.subscriptions if other is not subscription]
+
+    def publish(self, force, newtons, time):
+        """Queue one batch for every subscriber. Called from the acquisition loop, it never waits on a socket."""
+
+        # The list is replaced rather than changed, so it is read here without taking the lock
+        subscriptions = self.subscriptions
+        if not subscriptions or len(time) == 0:
+            return
+
+        payload = encode_batch(force, newtons, time)
+        for subscription in subscriptions:
+            subscription.put(len(time), payload)
+
+    def close(self):
+        self._closed = True
+        try:
+            # Wakes the thread blocked in accept()
+            self.listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.listener.close()
+        for subscription in self.subscriptions:
+            subscription.close()
+
+        family, bind = split_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(bind):
+            os.unlink(bind)
+
+
+class Subscriber():
+    """Receive the batches sent by a Publisher."""
+
+    def __init__(self, address='127.0.0.1:8765', timeout=None):
+        family, connect = split_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(connect)
+        self.stream = self.sock.makefile('rb')
+        self.dropped = 0
+
+    def read(self):
+        """The (force, newtons, time) arrays of the next batch, or None once the publisher has closed."""
+
+        header = self.stream.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, dropped, count = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError("Unexpected data from the publisher, not a batch frame")
+
+        body = self.stream.read(24 * count)
+        if len(body) < 24 * count:
+            return None
+        self.dropped += dropped
+
+        force, newtons, time = array('d'), array('d'), array('q')
+        force.frombytes(body[:8 * count])
+        newtons.frombytes(body[8 * count:16 * count])
+        time.frombytes(body[16 * count:])
+        if sys.byteorder == 'big':
+            force.byteswap(); newtons.byteswap(); time.byteswap()
+        return force, newtons, time
+
+    def __iter__(self):
+        while True:
+            batch = self.read()
+            if batch is None:
+                return
+            yield batch
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+if __name__ == '__main__':
+    subscriber = Subscriber(sys.argv[1] if len(sys.argv) > 1 else '127.0.0.1:8765')
+    try:
+        for force, newtons, time in subscriber:
+            sys.stdout.write(''.join(f"{f},{n},{t}\n" for f, n, t in zip(force, newtons, time)))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+        if subscriber.dropped:
+            print(f"{subscriber.dropped} batches were dropped by the publisher", file=sys.stderr)
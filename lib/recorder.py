@@ -0,0 +1,188 @@
+"""Columnar storage of the samples collected during a recording session.
+
+    Storing each sample as a list of 3 Python objects costs around 200 bytes per sample and puts pressure on
+    the garbage collector in long sessions. class RecordBuffer stores force, newtons and relative time in typed
+    arrays instead, 24 bytes per sample, allocated in fixed-size chunks that are never resized or copied once
+    full, so appending is O(1) and views of the stored data stay valid whilst recording continues.
+
+        class RecordBuffer      parameters | chunk_size
+            self.force, self.newtons, self.time     lists of the chunks of each column, array('d') for force
+                                                    and newtons and array('q') for time in ms.
+            function extend()       store a batch of samples given as equal length arrays.
+            function chunks()       yield zero-copy memoryviews of the filled part of each chunk.
+            property nbytes         memory allocated by the buffer in bytes.
+
+        class StreamingWriter   parameters | path, stats, verbose
+            Writes a recording session to a CSV file whilst it is recorded. The file and its header are created
+            straight away, samples passed to extend() are collected in a RecordBuffer and written in batches by
+            a background thread every flush_interval seconds, and fsync'd every fsync_interval seconds, so a
+            crash or a closed window loses at most the last few seconds. The peak/average summary row is only
+            written by close(), which returns immediately and leaves the final write to the background thread.
+            The summary is taken from stats, a RunningStats from lib/stats.py kept up to date by the caller, so
+            the recorded data is never read back. close() keeps a copy of stats, so the caller can reset them for
+            the next session straight away.
+            Memory use is bounded by the samples received within one flush_interval; the most held at once,
+            self.buffer_peak in bytes, is printed with the summary when verbose.
+            The file format is given by _open(), _write_chunk() and _write_summary(), overridden by
+            CompactWriter in lib/compact.py to record in the compact binary format instead of CSV.
+"""
+
+import os, sys
+import csv
+import copy
+import threading
+import time as _time
+from array import array
+
+
+class RecordBuffer():
+    """Typed, chunk-grown columns of force, newtons and time for a recording session."""
+
+    def __init__(self, chunk_size=65536):
+        self.chunk_size = chunk_size
+        self.force = []
+        self.newtons = []
+        self.time = []
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def _grow(self):
+        self.force.append(array('d', bytes(8 * self.chunk_size)))
+        self.newtons.append(array('d', bytes(8 * self.chunk_size)))
+        self.time.append(array('q', bytes(8 * self.chunk_size)))
+
+    def extend(self, force, newtons, time):
+        """Store a batch of samples given as equal length arrays or sequences."""
+
+        done, count = 0, len(time)
+        while done < count:
+            i = self.length % self.chunk_size
+            if i == 0:
+                self._grow()
+
+            n = min(count - done, self.chunk_size - i)
+            self.force[-1][i:i + n] = array('d', force[done:done + n])
+            self.newtons[-1][i:i + n] = array('d', newtons[done:done + n])
+            self.time[-1][i:i + n] = array('q', time[done:done + n])
+            self.length += n; done += n
+
+    def chunks(self):
+        """Yield (force, newtons, time) memoryviews of the filled part of each chunk, in order."""
+
+        for k in range(len(self.time)):
+            n = min(self.chunk_size, self.length - k * self.chunk_size)
+            yield memoryview(self.force[k])[:n], memoryview(self.newtons[k])[:n], memoryview(self.time[k])[:n]
+
+    @property
+    def nbytes(self):
+        return len(self.time) * self.chunk_size * 24
+
+
+class StreamingWriter(threading.Thread):
+    """Write a recording session to a CSV file in buffered batches from a background thread."""
+
+    fieldnames = ['force', 'newtons', 'time', 'peak', 'average']
+    flush_interval = 0.5
+    fsync_interval = 5.0
+
+    def __init__(self, path, stats, verbose=False):
+        super(StreamingWriter, self).__init__(daemon=True)
+        self.path = path
+        self.stats = stats
+        self.verbose = verbose
+        self.count = 0
+        self.buffer_peak = 0
+
+        self._pending = RecordBuffer(chunk_size=4096)
+        self._lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._closed = False
+
+        self._open()
+        self._file.flush()
+
+        self.start()
+
+    def _open(self):
+        """Create the file and write its header."""
+
+        self._file = open(self.path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.fieldnames)
+
+    def _write_chunk(self, force, newtons, time):
+        self._writer.writerows(zip(force, newtons, time, ('',) * len(time), ('',) * len(time)))
+
+    def _write_summary(self):
+        self._writer.writerow(['', '', '', self.stats.max, round(self.stats.mean, 2)])
+
+    def extend(self, force, newtons, time):
+        """Queue a batch of samples to be written. Never blocks on file I/O."""
+
+        with self._lock:
+            self._pending.extend(force, newtons, time)
+
+    def flush(self):
+        """Ask the background thread to write and fsync all queued samples now."""
+        self._flush_event.set()
+
+    def close(self):
+        """Finish the session. The remaining samples and the summary row are written by the background thread,
+        call join() to wait for the file to be complete."""
+
+        # The caller may reset stats for its next session before the background thread writes the summary, so the
+        # summary is taken from a copy of stats as they stand now
+        self.stats = copy.copy(self.stats)
+        self._closed = True
+        self._flush_event.set()
+
+    def _write_pending(self):
+        with self._lock:
+            batch, self._pending = self._pending, RecordBuffer(chunk_size=4096)
+
+        if len(batch) == 0:
+            return
+        self.buffer_peak = max(self.buffer_peak, batch.nbytes)
+
+        for force, newtons, time in batch.chunks():
+            self._write_chunk(force, newtons, time)
+        self.count += len(batch)
+
+    def run(self):
+        last_sync = _time.monotonic()
+        while True:
+            forced = self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+
+            self._write_pending()
+            self._file.flush()
+            if forced or _time.monotonic() - last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                last_sync = _time.monotonic()
+
+            if self._closed:
+                break
+
+        self._finalize()
+
+    def _finalize(self):
+        self._write_pending()
+        if self.count > 0:
+            self._write_summary()
+
+            if self.verbose:
+                print(f"Gathered recordings: {self.count} samples", file=sys.stderr)
+                print(f"Peak value: {self.stats.max} N at {self.stats.max_time} ms", file=sys.stderr)
+                print(f"Average value: {round(self.stats.mean, 2)} N, standard deviation {round(self.stats.std, 3)} N", file=sys.stderr)
+                print(f"Impulse: {round(self.stats.impulse, 3)} N*s", file=sys.stderr)
+                print(f"Write buffer: at most {self.buffer_peak / 1024:.0f} KiB held between writes", file=sys.stderr)
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+        if self.count == 0:
+            # Nothing was recorded, do not leave a file with only a header behind
+            os.unlink(self.path)
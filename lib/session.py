@@ -0,0 +1,173 @@
+"""Loading and analysis of recorded sessions with NumPy.
+
+    Sessions are the CSV files written to 'results' by a recording, one row of force, newtons and time per
+    sample followed by a summary row holding only the peak and average. The data rows are parsed in bulk into
+    float arrays by numpy.loadtxt() and the summary row, identified by its empty force column, is separated out
+    before parsing. A session written by a recording that never completed has no summary row; its peak and
+    average are then calculated from the data.
+
+        class Session       parameters | force, newtons, time, peak, average, peak_index, refined_average
+            The arrays of a session and its summary. Any of peak, average, the index of the peak and the refined
+            average, given as a (trigger, value) pair, that is not given is only calculated from the arrays the
+            first time it is used, and then kept, so a summary read from a file header never costs a pass over
+            the data. Derived values are calculated with vectorised operations:
+                function bounds()           the samples above 90% of the trigger threshold.
+                function refined_average()  the mean of bounds(), the 'Average ±10%' of a session.
+                function peak_index()       the index of the sample holding the peak.
+                function trigger_index()    the index of the first sample at or above the trigger threshold.
+                function impulse()          the force-time integral in N*s by the trapezoidal rule.
+                function duration()         time in ms from the first to the last sample.
+
+        function read_csv()     parameters | path
+            Load a session from a CSV file.
+
+        function read_session() parameters | path
+            Load a session from a CSV file, a compact session file (lib/compact.py) or a mapped session file
+            (lib/mapped.py), by its extension. The arrays of a mapped session are views of the file on disk.
+
+        class SessionCache  parameters | capacity
+            The last capacity sessions loaded through read_session(), keyed by path and modification time, so
+            a session opened again is not read from disk unless its file has changed since.
+            function load()             return the session in path, from the cache if it is current.
+"""
+
+import os
+import io
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.session requires {e.name}, install it with: pip install numpy") from e
+
+
+class Session():
+    """The force, newtons and time arrays of a recorded session and its summary."""
+
+    def __init__(self, force, newtons, time, peak=None, average=None, peak_index=None, refined_average=None):
+        self.force = force
+        self.newtons = newtons
+        self.time = time
+        self._peak = peak
+        self._average = average
+        self._peak_index = peak_index
+        # Refined averages by trigger threshold
+        self._refined = dict([refined_average]) if refined_average is not None else {}
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def peak(self):
+        if self._peak is None and len(self.newtons) > 0:
+            self._peak = float(self.newtons.max())
+        return self._peak
+
+    @property
+    def average(self):
+        if self._average is None and len(self.newtons) > 0:
+            self._average = float(self.newtons.mean())
+        return self._average
+
+    def bounds(self, trigger=0.5):
+        return self.newtons[self.newtons > trigger * 0.9]
+
+    def refined_average(self, trigger=0.5):
+        if trigger not in self._refined:
+            # Summed in place rather than through bounds(), which would copy the samples
+            above = self.newtons > trigger * 0.9
+            count = int(np.count_nonzero(above))
+            self._refined[trigger] = (round(float(np.sum(self.newtons, where=above)) / count, 2) if count > 0
+                                      else 0.0)
+        return self._refined[trigger]
+
+    def peak_index(self):
+        """Index of the first sample equal to the peak, or of the highest newtons if the peak in the summary
+        was not taken from newtons."""
+
+        if self._peak_index is None:
+            found = np.flatnonzero(self.newtons == self.peak)
+            self._peak_index = int(found[0]) if len(found) > 0 else int(np.argmax(self.newtons))
+        return self._peak_index
+
+    def trigger_index(self, trigger=0.5):
+        """Index of the first sample at or above trigger, or 0 if no sample reaches it."""
+
+        above = self.newtons >= trigger
+        first = int(np.argmax(above)) if len(above) > 0 else 0
+        return first if len(above) > 0 and above[first] else 0
+
+    def impulse(self):
+        """Force-time integral in N*s, as RunningStats.impulse, with time in ms."""
+
+        if len(self.time) < 2:
+            return 0.0
+        return float(np.sum((self.newtons[1:] + self.newtons[:-1]) * np.diff(self.time))) / 2000
+
+    def duration(self):
+        return float(self.time[-1] - self.time[0]) if len(self.time) > 0 else 0.0
+
+
+def read_csv(path):
+    """Load a session from a CSV file written by a recording."""
+
+    with open(path, 'r', newline='') as data_file:
+        text = data_file.read()
+
+    # The summary row is the only row with an empty force column, a row cut short by a crash is dropped
+    body, peak, average = text[:text.rfind('\n') + 1], None, None
+    start = text.find('\n,')
+    if start != -1:
+        body = text[:start + 1]
+        for row in text[start + 1:].splitlines():
+            fields = row.split(',')
+            if len(fields) >= 5 and fields[3] != '':
+                peak = float(fields[3])
+            if len(fields) >= 5 and fields[4] != '':
+                average = float(fields[4])
+
+    data = np.loadtxt(io.StringIO(body), delimiter=',', skiprows=1, usecols=(0, 1, 2), ndmin=2)
+    force, newtons, time = np.ascontiguousarray(data.T)
+    return Session(force, newtons, time, peak, average)
+
+
+def read_session(path):
+    """Load a session from a CSV file, a compact .fcs file or a mapped .fcm file."""
+
+    if path.lower().endswith('.fcs'):
+        from lib.compact import read_compact
+        return read_compact(path)
+    elif path.lower().endswith('.fcm'):
+        from lib.mapped import read_mapped
+        return read_mapped(path)
+    return read_csv(path)
+
+
+class SessionCache():
+    """Least recently used sessions loaded by read_session(), keyed by path and modification time."""
+
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        path = os.path.realpath(path)
+        key = (path, os.stat(path).st_mtime_ns)
+        session = self.entries.get(key)
+        if session is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return session
+
+        # A file that has changed since it was cached is read again and its old entry dropped
+        for stale in [entry for entry in self.entries if entry[0] == path]:
+            del self.entries[stale]
+
+        session = read_session(path)
+        self.misses += 1
+        self.entries[key] = session
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return session
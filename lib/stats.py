@@ -0,0 +1,94 @@
+"""Incremental statistics of a live recording session.
+
+    class RunningStats is updated with every batch of samples as they arrive, so the summary of a session is
+    available at any moment without a second pass over the recorded data. All values are taken over newtons.
+
+        class RunningStats      parameters | trigger
+            self.count                  number of samples.
+            self.min, self.min_time     lowest newtons and the time it occurred at.
+            self.max, self.max_time     peak newtons and the time it occurred at.
+            self.mean, self.variance    mean and sample variance, updated with Welford's method; each batch
+                                        is combined with the running values using Chan's parallel update.
+            self.impulse                the force-time integral in N*s by the trapezoidal rule, time in ms.
+            self.duration               time in ms from the first to the last sample.
+            self.refined_average        the mean of all samples above 90% of the trigger threshold, as the
+                                        'Average ±10%' line drawn by PlotGraph, in lib/graph_plotter.py.
+"""
+
+import math
+
+
+class RunningStats():
+    """O(1) per sample statistics of newtons over a session."""
+
+    def __init__(self, trigger=0.5):
+        self.trigger = trigger
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = self.max = math.nan
+        self.min_time = self.max_time = None
+        self.impulse = 0.0
+
+        self._bounds_sum = 0.0
+        self._bounds_count = 0
+        self._first_time = None
+        self._last = None
+
+    def update(self, newtons, time):
+        """Add a batch of samples, newtons and the time of each sample in ms, given as equal length arrays."""
+
+        newtons = list(newtons)
+        k = len(newtons)
+        if k == 0:
+            return
+        if self.count == 0:
+            self._first_time = time[0]
+
+        batch_mean = sum(newtons) / k
+        batch_m2 = sum((x - batch_mean) ** 2 for x in newtons)
+        total = self.count + k
+        delta = batch_mean - self.mean
+        self.mean += delta * k / total
+        self._m2 += batch_m2 + delta * delta * self.count * k / total
+
+        low, high = min(newtons), max(newtons)
+        if self.count == 0 or low < self.min:
+            self.min = low; self.min_time = time[newtons.index(low)]
+        if self.count == 0 or high > self.max:
+            self.max = high; self.max_time = time[newtons.index(high)]
+        self.count = total
+
+        # Trapezoidal force-time integral, joined to the last sample of the previous batch
+        prev_n, prev_t = self._last if self._last is not None else (newtons[0], time[0])
+        area = 0.0
+        for n, t in zip(newtons, time):
+            area += (n + prev_n) * (t - prev_t)
+            prev_n, prev_t = n, t
+        self.impulse += area / 2000
+        self._last = (prev_n, prev_t)
+
+        threshold = self.trigger * 0.9
+        bounds = [x for x in newtons if x > threshold]
+        self._bounds_sum += sum(bounds)
+        self._bounds_count += len(bounds)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def refined_average(self):
+        return self._bounds_sum / self._bounds_count if self._bounds_count > 0 else math.nan
+
+    @property
+    def duration(self):
+        """Time in ms from the first to the last sample."""
+        return self._last[1] - self._first_time if self.count > 0 else 0
@@ -0,0 +1,124 @@
+"""Reconnection of a lost Arduino with exponential backoff, following the board from port to port.
+
+    class Supervisor is a single thread that owns every reconnection attempt. It sleeps until lost() is called,
+    which SerialReader does the moment its read fails, and then retries straight away, waiting initial seconds
+    after the first failed attempt and doubling the wait after every further failure up to maximum seconds.
+
+    The USB vendor ID, product ID and serial number of the board, its Fingerprint, are remembered under 'DEVICE'
+    in setup.ini once it has been connected. On every attempt the ports are enumerated and the board is looked for
+    by its fingerprint, so a board plugged back into a different USB socket is found on whichever port it now
+    has. Ports without USB information, such as the pty of lib/emulator.py, are tried by name only.
+
+    The time from the loss of the connection to the board being reacquired is printed and added to the
+    'reacquire' timer of lib/diagnostics.py.
+
+        class Fingerprint       parameters | vid, pid, serial_number
+            function of()           the fingerprint of the board on a port, None if the port has no USB information.
+            function find()         the ports currently holding a board with this fingerprint.
+
+        class Supervisor        parameters | target, initial, maximum, diagnostics
+            target is the object being reconnected, class Connect in arduino_main.py or class Device in
+            lib/devices.py, which provides the attributes port and fingerprint and a connect(port) method
+            returning True once connected.
+            function lost()         wake the supervisor to reconnect, safe to call from any thread.
+            function locate()       the port to try next.
+            function stop()         stop the supervisor thread.
+"""
+
+import sys
+import threading
+import time as _time
+from collections import namedtuple
+
+try:
+    from serial.tools import list_ports
+except ModuleNotFoundError as e:
+    raise ImportError(f"lib.supervisor requires {e.name}, install it with: pip install pyserial") from e
+
+
+class Fingerprint(namedtuple('Fingerprint', 'vid pid serial_number')):
+    """USB vendor ID, product ID and serial number identifying a board on any port."""
+
+    @classmethod
+    def of(cls, port):
+        for info in list_ports.comports():
+            if info.device == port and info.vid is not None:
+                return cls(info.vid, info.pid, info.serial_number or '')
+        return None
+
+    @classmethod
+    def from_config(cls, section):
+        try:
+            return cls(int(section['vid']), int(section['pid']), section.get('serial_number', ''))
+        except (KeyError, ValueError):
+            return None
+
+    def as_config(self):
+        return {'vid': str(self.vid), 'pid': str(self.pid), 'serial_number': self.serial_number}
+
+    def find(self):
+        return [info.device for info in list_ports.comports()
+                if (info.vid, info.pid, info.serial_number or '') == tuple(self)]
+
+
+class Supervisor(threading.Thread):
+    """Reconnect target whenever its connection is lost, with exponential backoff between attempts."""
+
+    def __init__(self, target, initial=0.1, maximum=5.0, diagnostics=None):
+        super(Supervisor, self).__init__(daemon=True)
+        self.target = target
+        self.initial = initial
+        self.maximum = maximum
+        self.diagnostics = diagnostics
+
+        self.attempts = 0
+        self.acquired = False
+        self._lost = threading.Event()
+        self._stop_event = threading.Event()
+
+        # Not connected yet, the first connection is made as soon as the thread starts
+        self._lost.set()
+
+    def lost(self):
+        self._lost.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._lost.set()
+
+    def locate(self):
+        """The port holding the board with the remembered fingerprint, preferring the stored port. Without a
+        fingerprint, or if the board is not enumerated at all, the stored port is tried by name."""
+
+        fingerprint = self.target.fingerprint
+        if fingerprint is not None:
+            found = fingerprint.find()
+            if found:
+                return self.target.port if self.target.port in found else found[0]
+        return self.target.port
+
+    def run(self):
+        while True:
+            self._lost.wait()
+            if self._stop_event.is_set():
+                return
+            self._lost.clear()
+
+            lost_at = _time.perf_counter()
+            delay, self.attempts = self.initial, 0
+            while not self._stop_event.is_set():
+                self.attempts += 1
+                if self.target.connect(self.locate()):
+                    break
+                self._stop_event.wait(delay)
+                delay = min(delay * 2, self.maximum)
+            else:
+                return
+
+            seconds = _time.perf_counter() - lost_at
+            if self.acquired:
+                print(f"Arduino reacquired on {self.target.port} after {seconds:.2f} seconds, "
+                      f"{self.attempts} attempts", file=sys.stderr)
+                if self.diagnostics is not None:
+                    self.diagnostics.reacquire.add(seconds)
+            self.acquired = True
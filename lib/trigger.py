@@ -0,0 +1,99 @@
+"""Threshold triggered recording with a pre-trigger history.
+
+    Whilst armed, class AutoTrigger is given every batch of samples drained by main() or headless() in
+    arduino_main.py. Until newtons crosses the threshold the batches are only kept in a RingBuffer from
+    lib/acquisition.py, a fixed block of memory which always holds the newest samples, so nothing grows however long
+    the trigger waits. When a sample reaches the threshold a session is started, the samples from the last
+    pre_trigger ms before the crossing are taken from the ring buffer and recorded first, followed by the rest
+    of the stream. The session is stopped once newtons has stayed below the threshold for hold_off ms.
+
+    Batches are copied into the ring buffer in bulk and scanned sample by sample without creating any objects
+    per sample, samples are only sliced out of a batch at the start and end of a session.
+
+        class AutoTrigger       parameters | on_start, on_samples, on_stop, threshold, pre_trigger, hold_off, capacity
+            on_start() is called when a session is triggered, on_samples(force, newtons, time) with every batch
+            of samples of the session, starting with the pre-trigger history, and on_stop() when the hold-off has
+            passed. Times are in ms, as sent by the Arduino. capacity is the size of the ring buffer in samples,
+            which must hold at least pre_trigger ms of samples at the sample rate of the stream.
+            function feed()         pass one batch of samples through the trigger.
+            function disarm()       stop a session in progress and clear the history.
+"""
+
+from bisect import bisect_left
+
+from lib.acquisition import RingBuffer
+
+
+class AutoTrigger():
+    """Start and stop recording sessions from the newtons crossing a threshold."""
+
+    def __init__(self, on_start, on_samples, on_stop, threshold=0.5, pre_trigger=500, hold_off=1000, capacity=16384):
+        self.on_start = on_start
+        self.on_samples = on_samples
+        self.on_stop = on_stop
+        self.threshold = threshold
+        self.pre_trigger = pre_trigger
+        self.hold_off = hold_off
+
+        self.history = RingBuffer(capacity)
+        self.triggered = False
+        self.last_above = None
+        self.sessions = 0
+
+    def feed(self, force, newtons, time):
+        """Pass one batch of samples through the trigger, calling the callbacks for any session in it."""
+
+        start = 0
+        count = len(time)
+        while start < count:
+            if not self.triggered:
+                start = self._wait(force, newtons, time, start)
+            else:
+                start = self._record(force, newtons, time, start)
+
+    def _wait(self, force, newtons, time, start):
+        threshold = self.threshold
+        for i in range(start, len(newtons)):
+            if newtons[i] >= threshold:
+                break
+        else:
+            self.history.extend(force[start:], newtons[start:], time[start:])
+            return len(time)
+
+        # Keep the history up to the crossing, then only the part of it within pre_trigger ms
+        self.history.extend(force[start:i], newtons[start:i], time[start:i])
+        h_force, h_newtons, h_time = self.history.drain()
+        first = bisect_left(h_time, time[i] - self.pre_trigger)
+
+        self.triggered = True
+        self.last_above = time[i]
+        self.sessions += 1
+        self.on_start()
+        if first < len(h_time):
+            self.on_samples(h_force[first:], h_newtons[first:], h_time[first:])
+        return i
+
+    def _record(self, force, newtons, time, start):
+        threshold, hold_off, last_above = self.threshold, self.hold_off, self.last_above
+        end = len(time)
+        for i in range(start, end):
+            if newtons[i] >= threshold:
+                last_above = time[i]
+            elif time[i] - last_above >= hold_off:
+                end = i
+                break
+        self.last_above = last_above
+
+        if end > start:
+            self.on_samples(force[start:end], newtons[start:end], time[start:end])
+        if end < len(time):
+            # Below the threshold for the whole hold-off, the rest of the batch waits for the next crossing
+            self.triggered = False
+            self.on_stop()
+        return end
+
+    def disarm(self):
+        if self.triggered:
+            self.triggered = False
+            self.on_stop()
+        self.history.clear()
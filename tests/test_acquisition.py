@@ -0,0 +1,44 @@
+"""RingBuffer shared between a producing reader thread and a draining consumer."""
+
+from array import array
+
+from lib.acquisition import RingBuffer
+
+
+class Storage(array):
+    """A column of the ring buffer noting whether it was read with the lock of the buffer held."""
+
+    def __getitem__(self, index):
+        self.locked.append(self.buffer.lock.locked())
+        return super(Storage, self).__getitem__(index)
+
+
+def watch(buffer):
+    locked = []
+    for name in ('force', 'newtons', 'time'):
+        column = Storage(getattr(buffer, name).typecode, getattr(buffer, name))
+        column.buffer, column.locked = buffer, locked
+        setattr(buffer, name, column)
+    return locked
+
+
+def test_drain_copies_while_the_reader_is_held_off():
+    buffer = RingBuffer(capacity=8)
+    locked = watch(buffer)
+
+    buffer.extend(array('d', [1.0] * 6), array('d', [2.0] * 6), array('q', range(6)))
+    assert list(buffer.drain()[2]) == list(range(6))
+    # Wrapping around the end of the storage
+    buffer.extend(array('d', [1.0] * 6), array('d', [2.0] * 6), array('q', range(6, 12)))
+    assert list(buffer.drain()[2]) == list(range(6, 12))
+
+    # The reader thread cannot overwrite the samples being copied, they are copied before tail is released
+    assert locked and all(locked)
+
+
+def test_overruns_are_counted_once():
+    buffer = RingBuffer(capacity=8)
+    buffer.extend(array('d', [0.0] * 12), array('d', [0.0] * 12), array('q', range(12)))
+
+    assert list(buffer.drain()[2]) == list(range(4, 12))
+    assert buffer.overruns == 4
@@ -0,0 +1,39 @@
+"""Batch analysis through arduino_main.py, with the worker processes started by spawn as on Windows."""
+
+import os, sys
+import shutil
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Runs arduino_main.py as the main module, so spawned workers import it again as Windows does
+SPAWN = """
+import multiprocessing, runpy, sys
+multiprocessing.set_start_method('spawn')
+sys.argv = [sys.argv[1], '-b']
+runpy.run_path(sys.argv[0], run_name='__main__')
+"""
+
+
+def write_session(path, peak):
+    newtons = [0.1, peak / 2, peak, peak / 2, 0.1]
+    with open(path, 'w', newline='') as csv_file:
+        csv_file.write("force,newtons,time,peak,average\n")
+        csv_file.writelines(f"{n * 10},{n},{t},,\n" for t, n in enumerate(newtons))
+        csv_file.write(f",,,{peak},{round(sum(newtons) / len(newtons), 2)}\n")
+
+
+def test_batch_with_spawned_workers(tmp_path):
+    shutil.copy(os.path.join(ROOT, 'setup.ini'), tmp_path)
+    os.mkdir(tmp_path / 'results')
+    for i, peak in enumerate((1.5, 2.5, 3.5)):
+        write_session(tmp_path / 'results' / f"session_{i}.csv", peak)
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', SPAWN, os.path.join(ROOT, 'arduino_main.py')], cwd=tmp_path,
+                            env=env, capture_output=True, text=True, timeout=120)
+
+    assert 'BrokenProcessPool' not in result.stderr, result.stderr
+    assert "Summarised 3 sessions, 0 from the index." in result.stdout, result.stdout + result.stderr
+    for name in ('session_0.csv', 'session_1.csv', 'session_2.csv'):
+        assert name in result.stdout
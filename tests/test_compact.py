@@ -0,0 +1,31 @@
+"""Conversion of CSV sessions to the compact format."""
+
+import math
+import warnings
+
+from lib.compact import from_csv, read_compact
+
+
+def test_empty_csv_converts_as_an_incomplete_session(tmp_path):
+    with open(tmp_path / "session.csv", 'w') as data_file:
+        data_file.write("force,newtons,time,peak,average\n")
+
+    with warnings.catch_warnings():
+        # NumPy warns that the CSV holds no data rows
+        warnings.simplefilter('ignore', UserWarning)
+        output = from_csv(str(tmp_path / "session.csv"))
+    session = read_compact(output)
+
+    assert len(session) == 0
+    assert session.peak is None and session.average is None
+
+
+def test_csv_round_trips_with_its_summary(tmp_path):
+    with open(tmp_path / "session.csv", 'w') as data_file:
+        data_file.write("force,newtons,time,peak,average\n")
+        data_file.writelines(f"{100 + t},{t / 10},{t}\n" for t in range(10))
+        data_file.write(",,,0.9,0.45\n")
+
+    session = read_compact(from_csv(str(tmp_path / "session.csv")))
+    assert len(session) == 10
+    assert session.peak == 0.9 and math.isclose(session.average, 0.45)
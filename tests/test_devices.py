@@ -0,0 +1,54 @@
+"""Samples limits of DeviceGroup.poll(), as headless_devices() records 'samples='."""
+
+import csv
+from array import array
+
+from lib.catalog import Catalog
+from lib.devices import DeviceGroup
+
+
+def test_poll_keeps_the_earliest_samples_of_all_devices(tmp_path):
+    # The ports do not exist, the ring buffers are filled here in place of the readers
+    group = DeviceGroup([str(tmp_path / "a"), str(tmp_path / "b")], 9600, maximum=0.1)
+    try:
+        for device in group.devices:
+            device.offset = 0
+        group.devices[0].buffer.extend(array('d', [1.0] * 200), array('d', [0.5] * 200), array('q', range(0, 400, 2)))
+        group.devices[1].buffer.extend(array('d', [1.0] * 200), array('d', [0.5] * 200), array('q', range(1, 401, 2)))
+
+        group.start_recording(Catalog(str(tmp_path / "sessions.db")), folder=str(tmp_path))
+        batches = group.poll(limit=150)
+        group.stop_recording()
+    finally:
+        group.close()
+
+    assert [len(times) for force, newtons, times in batches] == [75, 75]
+    assert group.count == 150
+    assert max(max(times) for force, newtons, times in batches) == 149
+    for device in group.devices:
+        path, = tmp_path.glob(f"session_*_{device.name}.csv")
+        with open(path, newline='') as data_file:
+            # The header and the data rows, the summary row has no force
+            assert len([row for row in csv.reader(data_file) if row[0]]) == 1 + 75
+
+
+def test_every_device_is_filtered_by_its_own_pipeline(tmp_path):
+    # Imported here, the filters pull in NumPy
+    from lib.dsp import from_config
+
+    group = DeviceGroup([str(tmp_path / "a"), str(tmp_path / "b")], 9600, maximum=0.1,
+                        pipeline=lambda name: from_config({'filters': 'ma:4'}))
+    try:
+        for device in group.devices:
+            device.offset = 0
+        group.devices[0].buffer.extend(array('d', [1.0] * 4), array('d', [0.0] * 4), array('q', range(4)))
+        group.poll()
+        # The moving average of each device continues from its own previous batch only
+        group.devices[0].buffer.extend(array('d', [1.0] * 4), array('d', [4.0] * 4), array('q', range(4, 8)))
+        group.devices[1].buffer.extend(array('d', [1.0] * 4), array('d', [4.0] * 4), array('q', range(4, 8)))
+        batches = group.poll()
+    finally:
+        group.close()
+
+    assert list(batches[0][1]) == [1.0, 2.0, 3.0, 4.0]
+    assert list(batches[1][1]) == [4.0, 4.0, 4.0, 4.0]
@@ -0,0 +1,32 @@
+"""PlotGraph built as 'Plot Graph' in Tools opens it, without a display."""
+
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+pytest.importorskip('PyQt5')
+pytest.importorskip('matplotlib')
+
+from lib.catalog import Catalog
+
+
+def test_plot_graph_opens_and_plots_a_session(tmp_path, monkeypatch):
+    from PyQt5 import QtWidgets
+    from lib.graph_plotter import PlotGraph
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "results").mkdir()
+    with open(tmp_path / "results" / "session_1.csv", 'w') as data_file:
+        data_file.write("force,newtons,time,peak,average\n")
+        data_file.writelines(f"1.0,{n},{t}\n" for t, n in enumerate([0.0, 1.0, 3.0, 2.0, 0.0]))
+        data_file.write(",,,3.0,1.2\n")
+
+    graph = PlotGraph(catalog=Catalog(str(tmp_path / "sessions.db")))
+    # The QApplication outlives the call that created it
+    assert QtWidgets.QApplication.instance() is not None
+
+    graph.plot("session_1.csv")
+    assert graph.peak == 3.0
+    assert list(graph.peak_marker.get_xdata()) == [2.0]
+    graph.close()
@@ -0,0 +1,65 @@
+"""Mapped session files written by MappedWriter and convert(), as PlotGraph opens them."""
+
+import math
+import random
+
+import numpy as np
+
+from lib.mapped import HEADER_SIZE, HEADER_V1, MappedSession, MappedWriter, ROW, convert
+from lib.session import Session
+from lib.stats import RunningStats
+
+
+def samples(count=5000, seed=1):
+    generator = random.Random(seed)
+    return [generator.random() * 3 for _ in range(count)], list(range(count))
+
+
+def record(path, newtons, time, chunk=333):
+    stats = RunningStats()
+    writer = MappedWriter(str(path), stats)
+    for i in range(0, len(time), chunk):
+        stats.update(newtons[i:i + chunk], time[i:i + chunk])
+        writer.extend([1.0] * len(time[i:i + chunk]), newtons[i:i + chunk], time[i:i + chunk])
+    writer.close()
+    writer.join()
+
+
+def test_header_holds_the_summary_plot_needs(tmp_path):
+    newtons, time = samples()
+    record(tmp_path / "session.fcm", newtons, time)
+    expected = Session(np.ones(len(time)), np.array(newtons), np.array(time, dtype=float))
+
+    mapped = MappedSession(str(tmp_path / "session.fcm"))
+    assert mapped.peak_index == expected.peak_index()
+    assert mapped.refined_average == expected.refined_average(0.5)
+
+    # Opening the session takes its summary from the header rather than a pass over the rows
+    session = mapped.session()
+    assert session._peak_index == expected.peak_index()
+    assert session._refined == {0.5: expected.refined_average(0.5)}
+    assert session.refined_average(0.7) == expected.refined_average(0.7)
+
+
+def test_convert_stores_the_summary(tmp_path):
+    newtons, time = samples()
+    with open(tmp_path / "session.csv", 'w') as data_file:
+        data_file.write("force,newtons,time,peak,average\n")
+        data_file.writelines(f"1.0,{n},{t}\n" for n, t in zip(newtons, time))
+
+    mapped = MappedSession(convert(str(tmp_path / "session.csv")))
+    assert mapped.peak_index == int(np.argmax(newtons))
+    assert mapped.trigger == 0.5 and not math.isnan(mapped.refined_average)
+
+
+def test_version_one_files_are_still_read(tmp_path):
+    newtons, time = samples(100)
+    rows = np.empty(len(time), dtype=ROW)
+    rows['time'], rows['force'], rows['newtons'] = time, 1.0, newtons
+    with open(tmp_path / "old.fcm", 'wb') as mapped_file:
+        mapped_file.write(HEADER_V1.pack(b'FCM1', len(time), max(newtons), 1.5).ljust(HEADER_SIZE, b'\0'))
+        mapped_file.write(rows.tobytes())
+
+    session = MappedSession(str(tmp_path / "old.fcm")).session()
+    assert session.peak == max(newtons)
+    assert session.peak_index() == int(np.argmax(newtons))
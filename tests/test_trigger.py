@@ -0,0 +1,81 @@
+"""Sessions recorded by AutoTrigger through StreamingWriter, as arduino_main.py records them."""
+
+import csv
+import math
+from array import array
+
+from lib.recorder import StreamingWriter
+from lib.stats import RunningStats
+from lib.trigger import AutoTrigger
+
+
+class Recorder():
+    """The start_recording(), record_samples() and stop_recording() of arduino_main.py, sharing one RunningStats."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.stats = RunningStats()
+        self.writers = []
+        self.writer = None
+
+    def start(self):
+        self.stats.reset()
+        self.writer = StreamingWriter(str(self.folder / f"session_{len(self.writers)}.csv"), self.stats)
+        self.writers.append(self.writer)
+
+    def samples(self, force, newtons, time):
+        self.stats.update(newtons, time)
+        self.writer.extend(force, newtons, time)
+
+    def stop(self):
+        self.writer.close()
+        self.writer = None
+
+
+def pulses(*peaks, width=50, gap=200):
+    """One batch holding a pulse of each peak, separated by gap ms below the threshold, one sample per ms."""
+
+    newtons = []
+    for peak in peaks:
+        newtons += [0.0] * gap + [peak] * width
+    newtons += [0.0] * gap
+    return array('d', [n * 10 for n in newtons]), array('d', newtons), array('q', range(len(newtons)))
+
+
+def summary(path):
+    with open(path, newline='') as csv_file:
+        rows = list(csv.reader(csv_file))
+    return float(rows[-1][3]), float(rows[-1][4]), len(rows) - 2
+
+
+def test_back_to_back_sessions_in_one_batch(tmp_path):
+    recorder = Recorder(tmp_path)
+    trigger = AutoTrigger(recorder.start, recorder.samples, recorder.stop, threshold=0.5, pre_trigger=20,
+                          hold_off=100)
+
+    # The first session stops and the second starts within the same batch
+    trigger.feed(*pulses(2.0, 3.0))
+    trigger.disarm()
+    for writer in recorder.writers:
+        writer.join()
+
+    assert trigger.sessions == 2
+    peaks = []
+    for writer in recorder.writers:
+        peak, average, count = summary(writer.path)
+        assert not math.isnan(peak) and average > 0
+        assert count == writer.count
+        peaks.append(peak)
+    assert peaks == [2.0, 3.0]
+
+
+def test_summary_survives_reset_after_close(tmp_path):
+    stats = RunningStats()
+    writer = StreamingWriter(str(tmp_path / "session.csv"), stats)
+    stats.update([1.0, 4.0, 1.0], [0, 1, 2])
+    writer.extend(array('d', [10.0, 40.0, 10.0]), array('d', [1.0, 4.0, 1.0]), array('q', [0, 1, 2]))
+    writer.close()
+    stats.reset()
+    writer.join()
+
+    assert summary(writer.path) == (4.0, 2.0, 3)